@@ -1,9 +1,89 @@
+import os
 from abc import ABC, abstractmethod
+from urllib.parse import urlparse, parse_qs
+import requests
+from tracing import tracer
+from .RequestScheduler import scheduler as default_scheduler
+
+PER_PAGE = 100
+# Els runners de GitHub Actions ja defineixen aquestes variables (també a GitHub Enterprise);
+# en local permeten apuntar a un servidor de proves (vegeu el paquet benchmark)
+API_URL = (os.getenv("GITHUB_API_URL") or "https://api.github.com").rstrip("/")
+GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL") or f"{API_URL}/graphql"
 
 class APInterface(ABC):
-    def __init__(self, par=False):
+    # Clau de `data` que proporciona el fetcher
+    provides = None
+    # "repo": s'executa per a cada repositori; "global": un sol cop, quan ja es coneixen els
+    # membres i els repositoris; None: metrics.py el fa servir pel nom (membres i repositoris)
+    scope = "repo"
+    # D'on surten les dades: els fetchers d'una mateixa clau es trien per la font (COMMITS_SOURCE)
+    source = "api"
+
+    def __init__(self, par=False, scheduler=None):
         self.par = par
+        self.scheduler = scheduler or default_scheduler
 
+    # Cada paginador és un generador: fa yield de la trucada ("get"/"graphql", ...) i rep la
+    # resposta. Així la mateixa lògica serveix per al mode amb fils i per al mode asyncio.
+    # Retorna el seu propi resultat parcial ({provides: ...}) i no modifica mai `data`
     @abstractmethod
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        pass
+
+    def get_paginated(self, url, headers):
+        # REST: es demana la primera pàgina i, amb l'última pàgina que indica la capçalera Link,
+        # la resta es demanen totes alhora
+        response = yield ("get", f"{url}?per_page={PER_PAGE}", headers)
+        if response.status_code != 200:
+            raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
+        items = response.json()
+        last_url = response.links.get("last", {}).get("url")
+        if last_url:
+            last_page = int(parse_qs(urlparse(last_url).query)["page"][0])
+            urls = [f"{url}?per_page={PER_PAGE}&page={page}" for page in range(2, last_page + 1)]
+            responses = yield ("get_all", urls, headers)
+            for page_response in responses:
+                if page_response.status_code != 200:
+                    raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {page_response.status_code}")
+                items.extend(page_response.json())
+        return items
+
+    def graphql(self, url, query, headers):
+        # Una consulta GraphQL que ha de retornar dades: els errors (cerca no vàlida, repositori
+        # inexistent...) aturen el fetcher en lloc de donar recomptes incomplets
+        response = yield ("graphql", url, query, headers)
+        if response.status_code != 200:
+            raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
+        data_graphql = response.json()
+        if data_graphql.get('errors') or not data_graphql.get('data'):
+            errors = data_graphql.get('errors') or [{}]
+            raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {errors[0].get('message')}")
+        return data_graphql['data']
+
+    def run(self, paginator):
+        try:
+            call = next(paginator)
+            while True:
+                call = paginator.send(self.scheduler.call(*call))
+        except StopIteration as stop:
+            return stop.value
+
+    async def run_async(self, paginator):
+        try:
+            call = next(paginator)
+            while True:
+                call = paginator.send(await self.scheduler.call_async(*call))
+        except StopIteration as stop:
+            return stop.value
+
+    def span(self, repo_name):
+        return tracer.span("fetch", fetcher=self.__class__.__name__, repo=repo_name)
+
     def execute(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
-        pass
\ No newline at end of file
+        with self.span(repo_name):
+            return self.run(self.fetch(owner_name, repo_name, headers, project_number, data))
+
+    async def execute_async(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
+        with self.span(repo_name):
+            return await self.run_async(self.fetch(owner_name, repo_name, headers, project_number, data))
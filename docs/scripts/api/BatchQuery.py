@@ -0,0 +1,128 @@
+import requests
+from . import repo_fetchers
+from .APInterface import GRAPHQL_URL
+from .CommitCache import CommitCache
+from .RecordTable import IssueTable, PullRequestTable
+from .RequestScheduler import scheduler as default_scheduler
+
+# Nodes estimats per pàgina de cada connexió (first: 100 més les subconnexions de cada node)
+CONNECTION_NODES = {
+    "issues": 300,
+    "pull_requests": 100,
+    "commits": 900
+}
+# Límit de l'API: 500.000 nodes per consulta. Ens quedem molt per sota perquè
+# les consultes grans també acaben amb timeouts
+MAX_NODES = 6000
+
+class BatchQuery:
+    def __init__(self, max_nodes=MAX_NODES, scheduler=None):
+        self.max_nodes = max_nodes
+        self.scheduler = scheduler or default_scheduler
+        self.issues = None
+        self.pull_requests = None
+        self.commits = None
+        # Commits que tenia la cache de cada repositori abans del recorregut per lots
+        self.checkpoints = {}
+
+    def repo_query(self, alias, owner_name, repo_name, cursors):
+        fields = []
+        if "issues" in cursors:
+            fields.append(self.issues.connection_query(cursors["issues"]))
+        if "pull_requests" in cursors:
+            fields.append(self.pull_requests.connection_query(cursors["pull_requests"]))
+        if "commits" in cursors:
+            fields.append("""
+                defaultBranchRef {
+                    name
+                    target {
+                        oid
+                        ... on Commit {
+                        %s
+                        }
+                    }
+                }
+            """ % self.commits.history_query(cursors["commits"]))
+        return '%s: repository(owner: "%s", name: "%s") { %s }' % (alias, owner_name, repo_name, "".join(fields))
+
+    def batches(self, pending):
+        batch = []
+        nodes = 0
+        for repo_name, cursors in pending.items():
+            repo_nodes = sum(CONNECTION_NODES[key] for key in cursors)
+            if batch and nodes + repo_nodes > self.max_nodes:
+                yield batch
+                batch = []
+                nodes = 0
+            batch.append(repo_name)
+            nodes += repo_nodes
+        if batch:
+            yield batch
+
+    def run_batch(self, owner_name, batch, pending, results, caches, missing, headers):
+        url = GRAPHQL_URL
+        query = "{ %s }" % "\n".join(self.repo_query(f"r{i}", owner_name, repo_name, pending[repo_name]) for i, repo_name in enumerate(batch))
+        response = self.scheduler.graphql(url, query, headers)
+        if response.status_code != 200:
+            raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
+        data_graphql = response.json().get('data') or {}
+
+        next_pending = {}
+        for i, repo_name in enumerate(batch):
+            repository = data_graphql.get(f"r{i}")
+            if repository is None:
+                # El repositori es recollirà amb les consultes individuals. GitHub també respon així
+                # als timeouts: els commits de les pàgines ja llegides es treuen de la cache perquè
+                # un cap conegut no faci creure a GetCommits que l'historial ja és complet
+                results.pop(repo_name, None)
+                if repo_name in caches:
+                    caches[repo_name].rollback(self.checkpoints[repo_name])
+                continue
+            cursors = {}
+            if "issues" in pending[repo_name]:
+                connection = repository['issues']
+                self.issues.parse_nodes(connection['nodes'], results[repo_name]['issues'])
+                if connection['pageInfo']['hasNextPage']:
+                    cursors["issues"] = connection['pageInfo']['endCursor']
+            if "pull_requests" in pending[repo_name]:
+                connection = repository['pullRequests']
+                self.pull_requests.parse_nodes(connection['nodes'], results[repo_name]['pull_requests'])
+                if connection['pageInfo']['hasNextPage']:
+                    cursors["pull_requests"] = connection['pageInfo']['endCursor']
+            if "commits" in pending[repo_name] and repository['defaultBranchRef'] is not None:
+                branch = repository['defaultBranchRef']
+                cache = caches[repo_name]
+                history = branch['target']['history']
+                keep_paging = self.commits.parse_history(history['edges'], cache, missing[repo_name])
+                if keep_paging and history['pageInfo']['hasNextPage']:
+                    cursors["commits"] = history['pageInfo']['endCursor']
+                else:
+                    cache.set_head(branch['name'], branch['target']['oid'])
+            if cursors:
+                next_pending[repo_name] = cursors
+        return next_pending
+
+    def execute(self, owner_name, repos, headers, keys=None) -> dict:
+        # Només es demanen les connexions de `keys` (les de les funcionalitats actives)
+        connections = [key for key in CONNECTION_NODES if keys is None or key in keys]
+        if not connections:
+            return {}
+        # Només es carreguen els fetchers de les connexions que es demanen
+        fetchers = {fetcher.provides: fetcher(scheduler=self.scheduler) for fetcher in repo_fetchers(connections)}
+        self.issues = fetchers.get("issues")
+        self.pull_requests = fetchers.get("pull_requests")
+        self.commits = fetchers.get("commits")
+        tables = {"issues": IssueTable, "pull_requests": PullRequestTable}
+        results = {repo_name: {key: tables[key]() for key in connections if key in tables} for repo_name in repos}
+        caches = {repo_name: CommitCache.open(owner_name, repo_name) for repo_name in repos} if "commits" in connections else {}
+        self.checkpoints = {repo_name: len(cache.commits) for repo_name, cache in caches.items()}
+        # Pares pendents del recorregut de la branca per defecte de cada repositori (GetCommits.parse_history)
+        missing = {repo_name: set() for repo_name in repos}
+        pending = {repo_name: dict.fromkeys(connections) for repo_name in repos}
+        # Cada ronda només torna a demanar les connexions amb hasNextPage
+        while pending:
+            next_pending = {}
+            for batch in list(self.batches(pending)):
+                next_pending.update(self.run_batch(owner_name, batch, pending, results, caches, missing, headers))
+            pending = {repo_name: cursors for repo_name, cursors in next_pending.items() if repo_name in results}
+        return results
@@ -0,0 +1,83 @@
+import os
+import threading
+from .DataStore import default_store
+from .RecordTable import CommitTable
+
+class CommitCache:
+    _opened = {}
+    _opened_lock = threading.Lock()
+
+    @classmethod
+    def open(cls, owner_name, repo_name):
+        # Una sola instància per repositori i execució, compartida entre GetCommits i BatchQuery
+        with cls._opened_lock:
+            key = (owner_name, repo_name)
+            if key not in cls._opened:
+                cls._opened[key] = cls(owner_name, repo_name, enabled=not os.getenv("COMMITS_FULL_SYNC"))
+            return cls._opened[key]
+
+    def __init__(self, owner_name, repo_name, enabled=True, store=None):
+        self.repo_name = repo_name
+        self.store = store or default_store()
+        self.heads = {}
+        self.commits = CommitTable()
+        # SHA binari -> SHA binaris dels pares, un darrere l'altre
+        self.parents = {}
+        self.lock = threading.Lock()
+        if enabled:
+            # Els commits ja coneguts són els que es van desar a la base de dades a l'última execució
+            self.heads = self.store.branch_heads(repo_name)
+            self.commits = self.store.records("commits", repo_name)
+            self.parents = self.store.commit_parents(repo_name)
+            # Una cache desada sense els pares dels commits no es pot podar ni garantir que sigui
+            # completa: es descarta i l'historial es torna a llegir sencer
+            if any(self.commits.key_at(row) not in self.parents for row in range(len(self.commits))):
+                self.heads = {}
+                self.commits = CommitTable()
+                self.parents = {}
+
+    def known(self, sha):
+        return sha in self.commits
+
+    def add(self, sha, parents, **commit):
+        with self.lock:
+            if sha in self.commits:
+                return False
+            self.parents[bytes.fromhex(sha)] = bytes.fromhex("".join(parents))
+            return self.commits.add(sha, **commit)
+
+    def rollback(self, size):
+        # Treu els commits afegits des que la cache en tenia `size` (un recorregut que no s'ha acabat)
+        with self.lock:
+            kept = {self.commits.key_at(row) for row in range(size)}
+            for row in range(size, len(self.commits)):
+                self.parents.pop(self.commits.key_at(row), None)
+            self.commits = self.commits.subset(kept)
+
+    def set_head(self, branch_name, oid):
+        with self.lock:
+            self.heads[branch_name] = oid
+
+    def reachable(self, heads):
+        reachable = set()
+        pending = [bytes.fromhex(head) for head in heads]
+        while pending:
+            sha = pending.pop()
+            if sha in reachable or sha not in self.parents:
+                continue
+            reachable.add(sha)
+            parents = self.parents[sha]
+            pending.extend(parents[i:i + 20] for i in range(0, len(parents), 20))
+        return reachable
+
+    def save(self, branches=None):
+        # Només es guarden els caps de les branques que encara existeixen i els commits que s'hi
+        # arriben: els d'un força-push, un rebase o una branca esborrada ja no compten
+        if branches is not None:
+            self.heads = {branch: oid for branch, oid in self.heads.items() if branch in branches}
+            reachable = self.reachable(branches.values())
+            if len(reachable) < len(self.commits):
+                self.commits = self.commits.subset(reachable)
+                self.parents = {sha: self.parents[sha] for sha in reachable}
+        self.store.save_branch_heads(self.repo_name, self.heads)
+        self.store.save_commit_parents(self.repo_name, self.parents)
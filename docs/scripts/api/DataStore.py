@@ -0,0 +1,261 @@
+import os
+import json
+import contextlib
+import sqlite3
+import threading
+from .RecordTable import TABLES
+
+CACHE_DIR = os.getenv("METRICS_CACHE_DIR", ".cache")
+DB_PATH = os.path.join(CACHE_DIR, "metrics.db")
+
+# clau de `data` -> (taula, columna identificadora, columnes)
+ENTITIES = {
+    "commits": ("commits", "sha", ["author", "additions", "deletions", "modified", "date", "merge"]),
+    "issues": ("issues", "id", ["state", "assignee", "has_pull_request", "pr_author_is_assignee", "created_at", "closed_at"]),
+    "pull_requests": ("pull_requests", "id", ["state", "author", "merged", "merged_by", "created_at", "closed_at", "merged_at"]),
+    "project": ("project_items", "id", ["title", "assignee", "status", "item_type"])
+}
+BOOL_COLUMNS = {"merge", "has_pull_request", "pr_author_is_assignee", "merged"}
+# Els resultats globals (repos i membres de l'organització) es guarden amb repo = ""
+GLOBAL = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    author TEXT,
+    date TEXT,
+    additions INTEGER,
+    deletions INTEGER,
+    modified INTEGER,
+    merge INTEGER,
+    PRIMARY KEY (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS commits_author ON commits (author);
+CREATE INDEX IF NOT EXISTS commits_date ON commits (date);
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT,
+    assignee TEXT,
+    has_pull_request INTEGER,
+    pr_author_is_assignee INTEGER,
+    created_at TEXT,
+    closed_at TEXT,
+    PRIMARY KEY (repo, id)
+);
+CREATE INDEX IF NOT EXISTS issues_assignee ON issues (assignee);
+CREATE TABLE IF NOT EXISTS pull_requests (
+    repo TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT,
+    author TEXT,
+    merged INTEGER,
+    merged_by TEXT,
+    created_at TEXT,
+    closed_at TEXT,
+    merged_at TEXT,
+    PRIMARY KEY (repo, id)
+);
+CREATE INDEX IF NOT EXISTS pull_requests_author ON pull_requests (author);
+CREATE TABLE IF NOT EXISTS project_items (
+    repo TEXT NOT NULL,
+    id TEXT NOT NULL,
+    title TEXT,
+    assignee TEXT,
+    status TEXT,
+    item_type TEXT,
+    PRIMARY KEY (repo, id)
+);
+CREATE TABLE IF NOT EXISTS branch_heads (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    oid TEXT NOT NULL,
+    PRIMARY KEY (repo, branch)
+);
+CREATE TABLE IF NOT EXISTS commit_parents (
+    repo TEXT NOT NULL,
+    sha BLOB NOT NULL,
+    parents BLOB NOT NULL,
+    PRIMARY KEY (repo, sha)
+);
+CREATE TABLE IF NOT EXISTS commit_authors (
+    email TEXT PRIMARY KEY,
+    login TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS partials (
+    repo TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (repo, position, key)
+);
+"""
+
+class DataStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self.migrate(connection)
+
+    def migrate(self, connection):
+        # Les bases de dades d'execucions anteriors no tenen les columnes afegides després
+        for table, _, columns in ENTITIES.values():
+            existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+            for column in columns:
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+
+    @contextlib.contextmanager
+    def connect(self):
+        # Una connexió per operació: els fils de GetCommits hi accedeixen alhora. En sortir es
+        # confirmen (o es desfan) els canvis i es tanca: `with connexió` sola no la tanca
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def has_repo(self, repo_name):
+        with self.connect() as connection:
+            return connection.execute("SELECT 1 FROM repos WHERE name = ?", (repo_name,)).fetchone() is not None
+
+    def write_partials(self, connection, repo_name, partials, keys=None):
+        position = connection.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM partials WHERE repo = ?", (repo_name,)).fetchone()[0]
+        for partial in partials:
+            for key, value in partial.items():
+                if keys is not None and key not in keys:
+                    continue
+                if key in ENTITIES:
+                    table, id_column, columns = ENTITIES[key]
+                    connection.executemany(
+                        f"INSERT OR REPLACE INTO {table} (repo, {id_column}, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 2))})",
+                        [(repo_name, record_id, *(record[column] for column in columns)) for record_id, record in value.items()]
+                    )
+                # També es guarda quina clau ha retornat cada parcial, per conservar-ne l'ordre
+                connection.execute("INSERT OR REPLACE INTO partials (repo, position, key, value) VALUES (?, ?, ?, ?)",
+                                   (repo_name, position, key, None if key in ENTITIES else json.dumps(value)))
+            position += 1
+
+    def delete_repo(self, connection, repo_name, keys=None):
+        for key, (table, _, _) in ENTITIES.items():
+            if keys is None or key in keys:
+                connection.execute(f"DELETE FROM {table} WHERE repo = ?", (repo_name,))
+        if keys is None:
+            connection.execute("DELETE FROM partials WHERE repo = ?", (repo_name,))
+        else:
+            connection.executemany("DELETE FROM partials WHERE repo = ? AND key = ?", [(repo_name, key) for key in keys])
+
+    def replace_all(self, global_partials, repo_partials):
+        with self.lock, self.connect() as connection:
+            connection.execute("DELETE FROM repos")
+            self.delete_repo(connection, GLOBAL)
+            self.write_partials(connection, GLOBAL, global_partials)
+            stored = [row[0] for row in connection.execute("SELECT DISTINCT repo FROM partials WHERE repo != ?", (GLOBAL,))]
+            for repo_name in stored:
+                if repo_name not in repo_partials:
+                    self.delete_repo(connection, repo_name)
+            for position, (repo_name, partials) in enumerate(repo_partials.items()):
+                connection.execute("INSERT INTO repos (name, position) VALUES (?, ?)", (repo_name, position))
+                self.delete_repo(connection, repo_name)
+                self.write_partials(connection, repo_name, partials)
+
+    def replace_repo(self, repo_name, partials, keys):
+        with self.lock, self.connect() as connection:
+            self.delete_repo(connection, repo_name, keys)
+            self.write_partials(connection, repo_name, partials, keys)
+
+    def records(self, key, repo_name=None):
+        table, id_column, columns = ENTITIES[key]
+        query = f"SELECT {id_column}, {', '.join(columns)} FROM {table}"
+        params = ()
+        if repo_name is not None:
+            query += " WHERE repo = ?"
+            params = (repo_name,)
+        query += " ORDER BY rowid"
+        records = TABLES[key]() if key in TABLES else {}
+        with self.connect() as connection:
+            for row in connection.execute(query, params):
+                records[row[0]] = {
+                    column: (bool(value) if column in BOOL_COLUMNS and value is not None else value)
+                    for column, value in zip(columns, row[1:])
+                }
+        return records
+
+    def partials(self):
+        # Torna a construir la llista ordenada de resultats parcials de l'última execució
+        with self.connect() as connection:
+            rows = connection.execute("""
+                SELECT partials.repo, partials.position, partials.key, partials.value
+                FROM partials LEFT JOIN repos ON repos.name = partials.repo
+                ORDER BY partials.repo != ?, repos.position, partials.position, partials.rowid
+            """, (GLOBAL,)).fetchall()
+        grouped = {}
+        for repo_name, position, key, value in rows:
+            partial = grouped.setdefault((repo_name, position), {})
+            partial[key] = self.records(key, repo_name) if key in ENTITIES else json.loads(value)
+        return list(grouped.values())
+
+    def keys(self):
+        # Claus de `data` que hi ha a la base de dades (depenen de l'estratègia de l'última execució)
+        with self.connect() as connection:
+            return {row[0] for row in connection.execute("SELECT DISTINCT key FROM partials")}
+
+    def values(self, key):
+        # Valors guardats d'una clau que no és una taula (p. ex. "members"), en l'ordre dels parcials
+        with self.connect() as connection:
+            rows = connection.execute("""
+                SELECT partials.value FROM partials LEFT JOIN repos ON repos.name = partials.repo
+                WHERE partials.key = ?
+                ORDER BY partials.repo != ?, repos.position, partials.position, partials.rowid
+            """, (key, GLOBAL)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def commit_authors(self):
+        # Usuari de GitHub de cada correu d'autor de commit (COMMITS_SOURCE=git)
+        with self.connect() as connection:
+            return dict(connection.execute("SELECT email, login FROM commit_authors"))
+
+    def save_commit_authors(self, authors):
+        with self.lock, self.connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO commit_authors (email, login) VALUES (?, ?)", authors.items())
+
+    def branch_heads(self, repo_name):
+        with self.connect() as connection:
+            return dict(connection.execute("SELECT branch, oid FROM branch_heads WHERE repo = ?", (repo_name,)))
+
+    def save_branch_heads(self, repo_name, heads):
+        with self.lock, self.connect() as connection:
+            connection.execute("DELETE FROM branch_heads WHERE repo = ?", (repo_name,))
+            connection.executemany("INSERT INTO branch_heads (repo, branch, oid) VALUES (?, ?, ?)",
+                                   [(repo_name, branch, oid) for branch, oid in heads.items()])
+
+    def commit_parents(self, repo_name):
+        # Pares de cada commit de la cache de commits, en binari (20 bytes per SHA)
+        with self.connect() as connection:
+            return dict(connection.execute("SELECT sha, parents FROM commit_parents WHERE repo = ?", (repo_name,)))
+
+    def save_commit_parents(self, repo_name, parents):
+        with self.lock, self.connect() as connection:
+            connection.execute("DELETE FROM commit_parents WHERE repo = ?", (repo_name,))
+            connection.executemany("INSERT INTO commit_parents (repo, sha, parents) VALUES (?, ?, ?)",
+                                   [(repo_name, sha, shas) for sha, shas in parents.items()])
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def default_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = DataStore()
+        return _default_store
@@ -0,0 +1,65 @@
+import ast
+import os
+import threading
+from types import SimpleNamespace
+
+class Declarations:
+    # Les classes d'un paquet de plugins (fetchers, col·lectors) es trien pels seus atributs de
+    # classe, que es llegeixen del codi font sense importar-lo: només s'importen els mòduls de les
+    # classes triades. Els atributs han de ser valors literals o constants literals del mòdul
+    def __init__(self, path, module_names, base):
+        # `base`: la classe base dels plugins, al mòdul del mateix nom
+        self.path = path
+        self.module_names = module_names
+        self.base = base
+        self.lock = threading.Lock()
+        self.found = None
+
+    def parse(self, module_name):
+        with open(os.path.join(self.path, f"{module_name}.py"), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        constants = self.literals(tree.body, {})
+        return {node.name: ([base.id for base in node.bases if isinstance(base, ast.Name)], self.literals(node.body, constants))
+                for node in tree.body if isinstance(node, ast.ClassDef)}
+
+    def literals(self, statements, constants):
+        values = {}
+        for statement in statements:
+            if not (isinstance(statement, ast.Assign) and len(statement.targets) == 1 and isinstance(statement.targets[0], ast.Name)):
+                continue
+            if isinstance(statement.value, ast.Name) and statement.value.id in constants:
+                values[statement.targets[0].id] = constants[statement.value.id]
+                continue
+            try:
+                values[statement.targets[0].id] = ast.literal_eval(statement.value)
+            except ValueError:
+                pass
+        return values
+
+    def classes(self):
+        # Nom de la classe -> (mòdul, atributs amb els heretats), en l'ordre dels mòduls i del codi
+        with self.lock:
+            if self.found is None:
+                declared = {}
+                for module_name in [self.base, *self.module_names]:
+                    for name, (bases, attributes) in self.parse(module_name).items():
+                        declared.setdefault(name, (module_name, bases, attributes))
+
+                def resolve(name):
+                    module_name, bases, attributes = declared[name]
+                    inherited = {}
+                    is_plugin = name == self.base
+                    for base in reversed(bases):
+                        if base in declared:
+                            base_is_plugin, base_attributes = resolve(base)
+                            if base_is_plugin:
+                                is_plugin = True
+                                inherited.update(base_attributes)
+                    return is_plugin, {**inherited, **attributes}
+
+                self.found = {}
+                for name, (module_name, _, _) in declared.items():
+                    is_plugin, attributes = resolve(name)
+                    if is_plugin and name != self.base:
+                        self.found[name] = (module_name, SimpleNamespace(**attributes))
+            return self.found
@@ -1,15 +1,13 @@
-from .APInterface import APInterface
-import requests
+from .APInterface import APInterface, API_URL
 
 class GetCollaborators(APInterface):
-    def execute(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
-        url = f"https://api.github.com/repos/{owner_name}/{repo_name}/collaborators"
-        response = requests.get(url, headers=headers)
+    provides = "members"
+    scope = None
 
-        if response.status_code != 200:
-            raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
-        
-        collaborators_data = response.json()
-        data['members'] = [obj['login'] for obj in collaborators_data]
-        data['members_images'] = {obj['login']: obj['avatar_url'] for obj in collaborators_data}
-        return data
\ No newline at end of file
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        url = f"{API_URL}/repos/{owner_name}/{repo_name}/collaborators"
+        collaborators_data = yield from self.get_paginated(url, headers)
+        return {
+            'members': [obj['login'] for obj in collaborators_data],
+            'members_images': {obj['login']: obj['avatar_url'] for obj in collaborators_data}
+        }
\ No newline at end of file
@@ -1,24 +1,31 @@
-from .APInterface import APInterface
-import requests
+from .APInterface import APInterface, API_URL, GRAPHQL_URL
+import asyncio
 import concurrent.futures
 from datetime import datetime
+from tracing import tracer
+from .CommitCache import CommitCache
+
+BRANCH_WORKERS = 4
+# Pares que es demanen de cada commit: en tenen un o dos, llevat dels merges "octopus"
+MAX_PARENTS = 8
 
 class GetCommits(APInterface):
+    provides = "commits"
+
     def get_branches(self,headers,repo_name,owner_name):
-        url = f"https://api.github.com/repos/{owner_name}/{repo_name}/branches"
-        response = requests.get(url, headers=headers)
-        return [branch['name'] for branch in response.json() if response.status_code == 200]
+        url = f"{API_URL}/repos/{owner_name}/{repo_name}/branches"
+        # Sense la llista de branques no es pot saber quins commits s'hi arriben: l'error atura el
+        # fetcher en lloc de desar una cache podada amb cap branca
+        branches_data = yield from self.get_paginated(url, headers)
+        return {branch['name']: branch['commit']['sha'] for branch in branches_data}
+
+    def get_default_branch(self,headers,repo_name,owner_name):
+        url = f"{API_URL}/repos/{owner_name}/{repo_name}"
+        response = yield ("get", url, headers)
+        return response.json().get('default_branch') if response.status_code == 200 else None
     
-    def query_graphql(self,owner_name, repo_name, branch_name, header,data):
-        url = "https://api.github.com/graphql"
-        cursor = None 
-        while True:
-            query = """
-            {
-            repository(owner: "%s", name: "%s") {
-                ref(qualifiedName: "refs/heads/%s") {
-                target {
-                    ... on Commit {
+    def history_query(self, cursor):
+        return """
                     history(first: 100%s) {
                         edges {
                             node {
@@ -31,8 +38,11 @@ class GetCommits(APInterface):
                                 additions  
                                 deletions
                                 committedDate
-                                parents(first: 1) {
+                                parents(first: %d) {
                                     totalCount
+                                    nodes {
+                                        oid
+                                    }
                                 }
                             }
                             }
@@ -41,64 +51,124 @@ class GetCommits(APInterface):
                             endCursor
                             }
                         }
+                """ % (f', after: "{cursor}"' if cursor else "", MAX_PARENTS)
+
+    def parse_history(self, commits_data_graphql, cache, missing):
+        # `missing`: pares dels commits nous del recorregut que encara no són a la cache
+        for commit_data in commits_data_graphql:
+            commit = commit_data['node']
+            sha = commit['oid']
+            missing.discard(sha)
+            if cache.known(sha):
+                continue
+            parents = [parent['oid'] for parent in commit['parents']['nodes']]
+            autor = commit['author']['user']['login']
+            additions = commit['additions']
+            deletions = commit['deletions']
+            date =  datetime.strptime(commit['committedDate'], "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d")
+            modified_lines = additions + deletions
+            cache.add(sha, parents,
+                author=autor,
+                additions=additions,
+                deletions=deletions,
+                modified=modified_lines,
+                date=date,
+                merge=True if commit['parents']['totalCount'] > 1 else False
+            )
+            missing.update(parents)
+        # Es deixa de paginar quan tots els pares dels commits nous ja són coneguts: la cache només
+        # té historials complets, així que la resta ja hi és. Una línia llarga fusionada (una PR
+        # d'un fork, una branca que no havíem vist) deixa pares pendents i el recorregut continua
+        missing.difference_update([parent for parent in missing if cache.known(parent)])
+        return bool(missing)
+
+    def query_graphql(self,owner_name, repo_name, branch_name, header,cache):
+        url = GRAPHQL_URL
+        cursor = None 
+        missing = set()
+        while True:
+            query = """
+            {
+            repository(owner: "%s", name: "%s") {
+                ref(qualifiedName: "refs/heads/%s") {
+                target {
+                    ... on Commit {
+                    %s
                     }
                 }
                 }
             }
             }
-                """ % (owner_name, repo_name, branch_name, f', after: "{cursor}"' if cursor else "")            
+                """ % (owner_name, repo_name, branch_name, self.history_query(cursor))            
             
-            response = requests.post(url, json={'query': query}, headers=header)
-            if response.status_code != 200:
-                raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
-            data_graphql = response.json()
-
-            if 'data' in data_graphql:
-                commits_data_graphql = data_graphql['data']['repository']['ref']['target']['history']['edges']
-                page_info = data_graphql['data']['repository']['ref']['target']['history']['pageInfo']
-                
-                for commit_data in commits_data_graphql:
-                    commit = commit_data['node']
-                    sha = commit['oid']
-                    autor = commit['author']['user']['login']
-                    additions = commit['additions']
-                    deletions = commit['deletions']
-                    date =  datetime.strptime(commit['committedDate'], "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d")
-                    modified_lines = additions + deletions
-                    if sha not in data:
-                        data[sha] = {
-                            "author": autor,
-                            "additions": additions,
-                            "deletions": deletions,
-                            "modified": modified_lines,
-                            "date": date,
-                            "merge": True if commit['parents']['totalCount'] > 1 else False
-                        }
-                if page_info['hasNextPage']:
-                    cursor = page_info['endCursor']
-                else:
-                    break
+            # Una resposta sense dades atura el recorregut amb un error: un historial a mitges no
+            # s'ha de desar amb el cap de la branca, que la propera execució donaria per sincronitzada
+            data_graphql = yield from self.graphql(url, query, header)
+            history = data_graphql['repository']['ref']['target']['history']
+            if not self.parse_history(history['edges'], cache, missing):
+                break
+            if history['pageInfo']['hasNextPage']:
+                cursor = history['pageInfo']['endCursor']
             else:
                 break
-        return data
-    
+
+    def sync_branch(self, owner_name, repo_name, branch, head, headers, cache):
+        # Si el cap ja és conegut (d'una execució anterior o d'una altra branca) no cal recórrer-la
+        if cache.known(head):
+            cache.set_head(branch, head)
+            return
+        with tracer.span("branch", repo=repo_name, branch=branch):
+            yield from self.query_graphql(owner_name, repo_name, branch, headers, cache)
+        cache.set_head(branch, head)
+
+    def store_commits(self, branches, cache):
+        cache.save(branches)
+        return {"commits": cache.commits.copy()}
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        branches = yield from self.get_branches(headers,repo_name,owner_name)
+        cache = CommitCache.open(owner_name, repo_name)
+        # La branca per defecte es recorre primer: la resta de branques en comparteixen
+        # gairebé tot l'historial i s'aturen quan hi arriben
+        default_branch = yield from self.get_default_branch(headers,repo_name,owner_name)
+        if default_branch in branches:
+            yield from self.sync_branch(owner_name, repo_name, default_branch, branches[default_branch], headers, cache)
+        for branch in branches:
+            if branch != default_branch:
+                yield from self.sync_branch(owner_name, repo_name, branch, branches[branch], headers, cache)
+        return self.store_commits(branches, cache)
+
     def execute(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
-        branches = self.get_branches(headers,repo_name,owner_name)
-        commits = {}
-        if self.par:
-            def process_branch(branch):
-                return self.query_graphql(owner_name, repo_name, branch, headers, {})
+        with self.span(repo_name):
+            if not self.par:
+                return self.run(self.fetch(owner_name, repo_name, headers, project_number, data))
+            return self.execute_parallel(owner_name, repo_name, headers)
+
+    def execute_parallel(self, owner_name, repo_name, headers):
+        branches = self.run(self.get_branches(headers,repo_name,owner_name))
+        cache = CommitCache.open(owner_name, repo_name)
+        default_branch = self.run(self.get_default_branch(headers,repo_name,owner_name))
+        if default_branch in branches:
+            self.run(self.sync_branch(owner_name, repo_name, default_branch, branches[default_branch], headers, cache))
+        pending = [branch for branch in branches if branch != default_branch]
+
+        def process_branch(branch):
+            self.run(self.sync_branch(owner_name, repo_name, branch, branches[branch], headers, cache))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=BRANCH_WORKERS) as executor:
+            list(executor.map(tracer.bind(process_branch), pending))
+        return self.store_commits(branches, cache)
+
+    async def execute_async(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
+        with self.span(repo_name):
+            return await self.execute_branches_async(owner_name, repo_name, headers)
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-                results = list(executor.map(process_branch, branches))
-            for result in results:
-                commits.update(result)
-        else :
-            for branch in branches:
-                commits.update(self.query_graphql(owner_name, repo_name, branch, headers, {}))
-                
-        if "commits" in data:
-            data["commits"].update(commits)
-        else:
-            data["commits"] = commits
-        return data
+    async def execute_branches_async(self, owner_name, repo_name, headers):
+        branches = await self.run_async(self.get_branches(headers,repo_name,owner_name))
+        cache = CommitCache.open(owner_name, repo_name)
+        default_branch = await self.run_async(self.get_default_branch(headers,repo_name,owner_name))
+        if default_branch in branches:
+            await self.run_async(self.sync_branch(owner_name, repo_name, default_branch, branches[default_branch], headers, cache))
+        await asyncio.gather(*(self.run_async(self.sync_branch(owner_name, repo_name, branch, branches[branch], headers, cache))
+                               for branch in branches if branch != default_branch))
+        return self.store_commits(branches, cache)
@@ -0,0 +1,147 @@
+import asyncio
+import base64
+import os
+import subprocess
+from datetime import datetime, timezone
+from .APInterface import APInterface, GRAPHQL_URL
+from .CommitCache import CommitCache
+from .DataStore import CACHE_DIR
+from tracing import tracer
+
+MIRRORS_DIR = os.path.join(CACHE_DIR, "mirrors")
+# Servidor git dels repositoris (GITHUB_SERVER_URL ja el defineixen els runners, també a GitHub Enterprise)
+SERVER_URL = (os.getenv("GITHUB_SERVER_URL") or "https://github.com").rstrip("/")
+# Commits per consulta per saber l'usuari de GitHub de cada correu nou
+AUTHORS_PER_QUERY = 100
+# Un commit per registre: \x01sha \x00 pares \x00 correu de l'autor \x00 data del committer;
+# després, una línia de --numstat per fitxer
+RECORD = "\x01"
+LOG_FORMAT = "--format=format:%x01%H%x00%P%x00%ae%x00%ct"
+
+class GetCommitsGit(APInterface):
+    # Alternativa a GetCommits (COMMITS_SOURCE=git): un mirall nu de cada repositori a .cache/mirrors
+    # que només baixa el que ha canviat, i una sola passada de `git log --numstat` per totes les
+    # branques. Els autors són correus: se'n demana l'usuari de GitHub un cop per correu i es guarda
+    provides = "commits"
+    source = "git"
+
+    def mirror(self, owner_name, repo_name, headers):
+        path = os.path.join(MIRRORS_DIR, owner_name, f"{repo_name}.git")
+        if not os.path.isdir(path):
+            os.makedirs(path)
+            self.git(path, "init", "--bare", "--quiet")
+            self.git(path, "config", "remote.origin.url", f"{SERVER_URL}/{owner_name}/{repo_name}.git")
+            # Només les branques (les mateixes que l'API), no refs/pull/*
+            self.git(path, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+        with tracer.span("git_fetch", repo=repo_name):
+            self.git(path, "fetch", "--prune", "--quiet", "origin", env=self.credentials(headers))
+        return path
+
+    def credentials(self, headers):
+        # El token no es desa a la configuració del mirall: arriba a git per l'entorn
+        token = (headers or {}).get("Authorization", "").split(" ")[-1]
+        if not token:
+            return None
+        basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        return {**os.environ, "GIT_CONFIG_COUNT": "1", "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}", "GIT_TERMINAL_PROMPT": "0"}
+
+    def git(self, path, *args, env=None):
+        result = subprocess.run(["git", "-C", path, *args], capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            raise RuntimeError(f"Error al fer la trucada a {self.__class__.__name__}: git {args[0]}: {result.stderr.strip()}")
+        return result.stdout
+
+    def branches(self, path):
+        refs = self.git(path, "for-each-ref", "--format=%(refname:short) %(objectname)", "refs/heads")
+        return dict(line.split(" ", 1) for line in refs.splitlines())
+
+    def existing(self, path, shas):
+        # Un cap antic pot haver desaparegut del mirall (força-push i gc): git log no l'acceptaria
+        if not shas:
+            return []
+        result = subprocess.run(["git", "-C", path, "cat-file", "--batch-check=%(objectname) %(objecttype)"],
+                                input="".join(f"{sha}\n" for sha in shas), capture_output=True, text=True)
+        return [line.split()[0] for line in result.stdout.splitlines() if line.endswith(" commit")]
+
+    def log(self, path, exclude):
+        # Cada commit surt un sol cop encara que sigui a diverses branques. Els merges es comparen
+        # amb el primer pare, com les additions/deletions de l'API
+        process = subprocess.Popen(["git", "-C", path, "log", "--branches", "--stdin", "--numstat", "-M",
+                                    "--diff-merges=first-parent", LOG_FORMAT],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, encoding="utf-8", errors="replace")
+        # Amb --stdin, els commits exclosos (^sha) es llegeixen abans de començar
+        process.stdin.write("".join(f"^{sha}\n" for sha in exclude))
+        process.stdin.close()
+        commit = None
+        for line in process.stdout:
+            if line.startswith(RECORD):
+                if commit is not None:
+                    yield commit
+                sha, parents, email, timestamp = line[1:].rstrip("\n").split("\x00")
+                commit = [sha, parents.split(), email.lower(), int(timestamp), 0, 0]
+            elif commit is not None and line.strip():
+                additions, deletions = line.split("\t", 2)[:2]
+                # Els fitxers binaris surten amb "-": no tenen línies
+                commit[4] += int(additions) if additions.isdigit() else 0
+                commit[5] += int(deletions) if deletions.isdigit() else 0
+        if commit is not None:
+            yield commit
+        errors = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"Error al fer la trucada a {self.__class__.__name__}: git log: {errors.strip()}")
+
+    def resolve_authors(self, owner_name, repo_name, headers, emails):
+        # Usuari de GitHub dels correus: el que retorna l'API per a un commit de cada correu
+        url = GRAPHQL_URL
+        authors = {}
+        pending = list(emails.items())
+        for start in range(0, len(pending), AUTHORS_PER_QUERY):
+            batch = pending[start:start + AUTHORS_PER_QUERY]
+            query = '{ repository(owner: "%s", name: "%s") { %s } }' % (owner_name, repo_name, "\n".join(
+                'c%d: object(oid: "%s") { ... on Commit { author { user { login } } } }' % (i, sha) for i, (_, sha) in enumerate(batch)))
+            repository = (yield from self.graphql(url, query, headers))['repository']
+            for i, (email, _) in enumerate(batch):
+                commit = repository.get(f"c{i}") or {}
+                user = (commit.get('author') or {}).get('user')
+                authors[email] = user['login'] if user else None
+        return authors
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        path = self.mirror(owner_name, repo_name, headers)
+        branches = self.branches(path)
+        cache = CommitCache.open(owner_name, repo_name)
+        # L'historial dels caps ja coneguts (d'aquesta execució o de l'anterior) no es torna a llegir
+        exclude = self.existing(path, {sha for sha in [*cache.heads.values(), *branches.values()] if cache.known(sha)})
+        with tracer.span("git_log", repo=repo_name):
+            commits = [commit for commit in self.log(path, exclude) if not cache.known(commit[0])]
+        authors = cache.store.commit_authors()
+        unknown = {}
+        for sha, _, email, _, _, _ in commits:
+            if email not in authors:
+                unknown.setdefault(email, sha)
+        if unknown:
+            resolved = yield from self.resolve_authors(owner_name, repo_name, headers, unknown)
+            # Els correus sense usuari es tornaran a demanar si surten en commits nous
+            cache.store.save_commit_authors({email: login for email, login in resolved.items() if login is not None})
+            authors.update(resolved)
+        for sha, parents, email, timestamp, additions, deletions in commits:
+            cache.add(sha, parents,
+                author=authors.get(email),
+                additions=additions,
+                deletions=deletions,
+                modified=additions + deletions,
+                date=datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d"),
+                merge=len(parents) > 1
+            )
+        for branch, head in branches.items():
+            cache.set_head(branch, head)
+        # Només es queden els commits que s'arriben des de les branques del mirall (fetch --prune
+        # ja n'ha tret les esborrades): els d'un força-push o d'una branca esborrada no compten
+        cache.save(branches)
+        return {"commits": cache.commits.copy()}
+
+    async def execute_async(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
+        # git és bloquejant: el fetcher sencer s'executa en un fil (amb el span actiu)
+        return await asyncio.to_thread(self.execute, owner_name, repo_name, headers, project_number, data)
@@ -0,0 +1,113 @@
+from .APInterface import APInterface, GRAPHQL_URL
+
+# La cerca de GitHub no retorna més de 1.000 resultats per consulta
+SEARCH_LIMIT = 1000
+ISSUE_FIELDS = """
+                            assignees(first: 1) {
+                                nodes {
+                                    login
+                                }
+                            }
+                            closedByPullRequestsReferences(first: 1) {
+                                totalCount
+                                nodes {
+                                    author {
+                                        login
+                                    }
+                                }
+                            }
+"""
+
+class GetIssueCounts(APInterface):
+    # Estratègia "counts": els totals surten de totalCount i només es baixen les issues tancades
+    # amb una PR enllaçada, les úniques que calen per a have_pull_request i assignee_is_pr_author.
+    # Els recomptes per membre els fa GetMemberCounts
+    provides = "issue_counts"
+
+    def linked_query(self, owner_name, repo_name, cursor):
+        return """
+                search(query: "repo:%s/%s is:issue is:closed linked:pr", type: ISSUE, first: 100%s) {
+                    issueCount
+                    nodes {
+                        ... on Issue {
+                            %s
+                        }
+                    }
+                    pageInfo {
+                        hasNextPage
+                        endCursor
+                    }
+                }
+            """ % (owner_name, repo_name, f', after: "{cursor}"' if cursor else "", ISSUE_FIELDS)
+
+    def closed_query(self, cursor):
+        return """
+                    issues(states: CLOSED, first: 100%s) {
+                        nodes {
+                            %s
+                        }
+                        pageInfo {
+                            hasNextPage
+                            endCursor
+                        }
+                    }
+            """ % (f', after: "{cursor}"' if cursor else "", ISSUE_FIELDS)
+
+    def parse_nodes(self, issues_data, linked):
+        # Per a cada assignat: [issues tancades amb PR, de les quals l'autor de la PR és l'assignat]
+        for issue in issues_data:
+            references = issue['closedByPullRequestsReferences']
+            assignees = issue['assignees']['nodes']
+            if references['totalCount'] == 0 or not assignees:
+                continue
+            assignee = assignees[0]['login']
+            author = references['nodes'][0]['author'] if references['nodes'] else None
+            counts = linked.setdefault(assignee, [0, 0])
+            counts[0] += 1
+            if author is not None and author['login'] == assignee:
+                counts[1] += 1
+        return linked
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        url = GRAPHQL_URL
+        query = """
+        {
+            repository(owner: "%s", name: "%s") {
+                issues {
+                    totalCount
+                }
+                closedIssues: issues(states: CLOSED) {
+                    totalCount
+                }
+            }
+            %s
+        }
+        """ % (owner_name, repo_name, self.linked_query(owner_name, repo_name, None))
+        data_graphql = yield from self.graphql(url, query, headers)
+        repository = data_graphql['repository']
+        search = data_graphql['search']
+        counts = {
+            "total": repository['issues']['totalCount'],
+            "closed": repository['closedIssues']['totalCount'],
+            "linked": {}
+        }
+        if search['issueCount'] <= SEARCH_LIMIT:
+            self.parse_nodes(search['nodes'], counts['linked'])
+            page_info = search['pageInfo']
+            while page_info['hasNextPage']:
+                query = "{ %s }" % self.linked_query(owner_name, repo_name, page_info['endCursor'])
+                search = (yield from self.graphql(url, query, headers))['search']
+                self.parse_nodes(search['nodes'], counts['linked'])
+                page_info = search['pageInfo']
+        else:
+            # Massa resultats per a la cerca: es recorren totes les issues tancades
+            cursor = None
+            while True:
+                query = '{ repository(owner: "%s", name: "%s") { %s } }' % (owner_name, repo_name, self.closed_query(cursor))
+                issues = (yield from self.graphql(url, query, headers))['repository']['issues']
+                self.parse_nodes(issues['nodes'], counts['linked'])
+                if not issues['pageInfo']['hasNextPage']:
+                    break
+                cursor = issues['pageInfo']['endCursor']
+        # Una entrada per repositori: els parcials de tots els repositoris es fusionen en un sol diccionari
+        return {"issue_counts": {repo_name: counts}}
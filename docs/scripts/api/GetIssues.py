@@ -1,18 +1,18 @@
-from .APInterface import APInterface
+from .APInterface import APInterface, GRAPHQL_URL
 import requests
+from .RecordTable import IssueTable
+
 class GetIssues(APInterface):
-    def execute(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
-        url = "https://api.github.com/graphql"
-        cursor = None
-        issues = {}
-        while True:
-            query = """
-            {
-                repository(owner: "%s", name: "%s") {
+    provides = "issues"
+
+    def connection_query(self, cursor):
+        return """
                     issues(first: 100%s) {
                         nodes {
                             id
                             state
+                            createdAt
+                            closedAt
                             assignees(first: 1) {
                                 nodes {
                                     login
@@ -32,39 +32,55 @@ class GetIssues(APInterface):
                             endCursor
                         }
                     }
+            """ % (f', after: "{cursor}"' if cursor else "")
+
+    def parse_nodes(self, issues_data, issues):
+        for issue in issues_data:
+            issue_id = issue['id']
+            state =  issue["state"]
+            assignees = issue['assignees']['nodes']
+            assignee = assignees[0]['login'] if assignees else None
+            has_pr = issue['closedByPullRequestsReferences']['totalCount'] > 0
+            pr_author = issue['closedByPullRequestsReferences']['nodes'][0]['author']['login'] if has_pr else None
+            pr_author_is_assignee = pr_author == assignee if has_pr else None
+            # Només el dia: és el que fa servir el càlcul de l'històric (metrics.py backfill)
+            created_at = issue['createdAt'][:10] if issue['createdAt'] else None
+            closed_at = issue['closedAt'][:10] if issue['closedAt'] else None
+            issues.add(issue_id,
+                state=state,
+                assignee=assignee,
+                has_pull_request=has_pr,
+                pr_author_is_assignee=pr_author_is_assignee,
+                created_at=created_at,
+                closed_at=closed_at
+            )
+        return issues
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        url = GRAPHQL_URL
+        cursor = None
+        issues = IssueTable()
+        while True:
+            query = """
+            {
+                repository(owner: "%s", name: "%s") {
+                    %s
                 }
             }
-            """ % (owner_name, repo_name,f', after: "{cursor}"' if cursor else "")
+            """ % (owner_name, repo_name, self.connection_query(cursor))
 
-            response = requests.post(url, json={'query': query}, headers=headers)
+            response = yield ("graphql", url, query, headers)
             if response.status_code != 200:
                 raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
             data_graphql = response.json()
             if 'data' in data_graphql:
                 issues_data = data_graphql['data']['repository']['issues']['nodes']
                 page_info = data_graphql['data']['repository']['issues']['pageInfo']
-                for issue in issues_data:
-                    issue_id = issue['id']
-                    state =  issue["state"]
-                    assignees = issue['assignees']['nodes']
-                    assignee = assignees[0]['login'] if assignees else None
-                    has_pr = issue['closedByPullRequestsReferences']['totalCount'] > 0
-                    pr_author = issue['closedByPullRequestsReferences']['nodes'][0]['author']['login'] if has_pr else None
-                    pr_author_is_assignee = pr_author == assignee if has_pr else None
-                    issues[issue_id] = {
-                        "state": state,
-                        "assignee": assignee,
-                        "has_pull_request": has_pr,
-                        "pr_author_is_assignee": pr_author_is_assignee
-                    }
+                self.parse_nodes(issues_data, issues)
                 if page_info['hasNextPage']:
                     cursor = page_info['endCursor']
                 else:
                     break
             else:
                 break
-        if "issues" in data:
-            data["issues"].update(issues)
-        else:
-            data["issues"] = issues
-        return data
\ No newline at end of file
+        return {"issues": issues}
\ No newline at end of file
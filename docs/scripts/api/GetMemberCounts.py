@@ -0,0 +1,124 @@
+from .APInterface import APInterface, GRAPHQL_URL
+
+# Cerques per consulta: cada una és un àlies amb només issueCount
+SEARCHES_PER_QUERY = 50
+# Límits de la cerca de GitHub: 256 caràcters per consulta i com a molt cinc operadors
+MAX_SEARCH_LENGTH = 256
+MAX_SEARCH_REPOS = 5
+# Espai per al nom d'un membre en una cerca
+MAX_LOGIN_LENGTH = 40
+# GitHub no admet més de 10 assignats per issue
+MAX_ASSIGNEES = 10
+# Recompte de cada membre -> qualificadors de la cerca
+COUNTS = {
+    "assigned": "is:issue assignee:%s",
+    "closed": "is:issue is:closed assignee:%s",
+    "created": "is:pr author:%s"
+}
+UNASSIGNED = "is:issue no:assignee"
+
+class GetMemberCounts(APInterface):
+    # Estratègia "counts": issues assignades, issues assignades tancades i PRs creades de cada
+    # membre, amb una cerca per membre per a tots els repositoris alhora, i les issues sense cap
+    # membre entre els assignats. Necessita la llista de membres (data["members"]), els
+    # repositoris (data["repos"]) i si són tota l'organització (data["whole_org"])
+    provides = "member_counts"
+    scope = "global"
+
+    def scopes(self, owner_name, repos, whole_org, reserved):
+        # `reserved`: caràcters de la cerca que no són els qualificadors org: o repo:
+        if whole_org:
+            return [f"org:{owner_name}"]
+        # Els qualificadors repo: d'una mateixa cerca se sumen; els repositoris es reparteixen
+        # en tantes cerques com calgui
+        scopes = []
+        current = []
+        for repo_name in repos:
+            qualifier = f"repo:{owner_name}/{repo_name}"
+            if current and (len(current) == MAX_SEARCH_REPOS or len(" ".join(current + [qualifier])) + reserved > MAX_SEARCH_LENGTH):
+                scopes.append(" ".join(current))
+                current = []
+            current.append(qualifier)
+        if current:
+            scopes.append(" ".join(current))
+        return scopes
+
+    def searches(self, owner_name, members, repos, whole_org):
+        # (membre, recompte, text de la cerca) de totes les cerques que cal fer
+        reserved = max(len(qualifiers % "") for qualifiers in COUNTS.values()) + MAX_LOGIN_LENGTH
+        for scope in self.scopes(owner_name, repos, whole_org, reserved):
+            for member in members:
+                for count, qualifiers in COUNTS.items():
+                    yield member, count, f"{scope} {qualifiers % member}"
+
+    def non_assigned_searches(self, owner_name, members, repos, whole_org):
+        # Les issues sense cap membre entre els assignats no es poden treure dels recomptes per
+        # membre (una issue amb dos assignats hi compta dos cops): una cerca que exclou tots els
+        # membres, si hi cap. Si no, es compten les issues sense assignats i les assignades es
+        # recorren a part. Retorna les cerques i si cal recórrer les assignades
+        filters = " ".join(["is:issue"] + [f"-assignee:{member}" for member in members])
+        scopes = self.scopes(owner_name, repos, whole_org, len(filters) + 1)
+        if all(len(f"{scope} {filters}") <= MAX_SEARCH_LENGTH for scope in scopes):
+            return [(None, "non_assigned", f"{scope} {filters}") for scope in scopes], False
+        scopes = self.scopes(owner_name, repos, whole_org, len(UNASSIGNED) + 1)
+        return [(None, "non_assigned", f"{scope} {UNASSIGNED}") for scope in scopes], True
+
+    def assigned_query(self, owner_name, repo_name, cursor):
+        return """
+        {
+            repository(owner: "%s", name: "%s") {
+                issues(first: 100, filterBy: {assignee: "*"}%s) {
+                    nodes {
+                        assignees(first: %d) {
+                            nodes {
+                                login
+                            }
+                        }
+                    }
+                    pageInfo {
+                        hasNextPage
+                        endCursor
+                    }
+                }
+            }
+        }
+        """ % (owner_name, repo_name, f', after: "{cursor}"' if cursor else "", MAX_ASSIGNEES)
+
+    def assigned_to_others(self, owner_name, repos, members, headers):
+        # Issues assignades només a persones que no són membres, repositori per repositori
+        url = GRAPHQL_URL
+        members = set(members)
+        count = 0
+        for repo_name in repos:
+            cursor = None
+            while True:
+                issues = (yield from self.graphql(url, self.assigned_query(owner_name, repo_name, cursor), headers))['repository']['issues']
+                count += sum(1 for issue in issues['nodes']
+                             if not any(assignee['login'] in members for assignee in issue['assignees']['nodes']))
+                if not issues['pageInfo']['hasNextPage']:
+                    break
+                cursor = issues['pageInfo']['endCursor']
+        return count
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        url = GRAPHQL_URL
+        members = list(dict.fromkeys(data.get("members") or []))
+        repos = data.get("repos") or []
+        whole_org = data.get("whole_org", False)
+        counts = {count: dict.fromkeys(members, 0) for count in COUNTS}
+        counts["non_assigned"] = 0
+        non_assigned, page_assigned = self.non_assigned_searches(owner_name, members, repos, whole_org)
+        searches = list(self.searches(owner_name, members, repos, whole_org)) + non_assigned
+        for start in range(0, len(searches), SEARCHES_PER_QUERY):
+            batch = searches[start:start + SEARCHES_PER_QUERY]
+            query = "{ %s }" % "\n".join(
+                's%d: search(query: "%s", type: ISSUE) { issueCount }' % (i, text) for i, (_, _, text) in enumerate(batch))
+            results = yield from self.graphql(url, query, headers)
+            for i, (member, count, _) in enumerate(batch):
+                if member is None:
+                    counts[count] += results[f"s{i}"]['issueCount']
+                else:
+                    counts[count][member] += results[f"s{i}"]['issueCount']
+        if page_assigned:
+            counts["non_assigned"] += yield from self.assigned_to_others(owner_name, repos, members, headers)
+        return {"member_counts": counts}
@@ -1,17 +1,13 @@
-from .APInterface import APInterface
-import requests
+from .APInterface import APInterface, API_URL
 
 class GetOrgRepos(APInterface):
-    def execute(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
-        url = f"https://api.github.com/orgs/{owner_name}/repos"
-        response = requests.get(url, headers=headers)
+    provides = "repos"
+    scope = None
 
-        if response.status_code != 200:
-            raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
-
-        repos_data = response.json()
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        url = f"{API_URL}/orgs/{owner_name}/repos"
+        repos_data = yield from self.get_paginated(url, headers)
         repos = []
         for repo_data in repos_data:
             repos.append(repo_data['name'])
-        data['repos'] = repos
-        return data
\ No newline at end of file
+        return {'repos': repos}
\ No newline at end of file
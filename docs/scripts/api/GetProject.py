@@ -1,12 +1,13 @@
-from .APInterface import APInterface
+from .APInterface import APInterface, GRAPHQL_URL
 import requests
 
 class GetProjects(APInterface):
-    def execute(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
+    provides = "project"
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
         if project_number < 0: 
-            data["project"] = {}
-            return data
-        url = "https://api.github.com/graphql"
+            return {"project": {}}
+        url = GRAPHQL_URL
         cursor = None
         project = {}
         while True:
@@ -62,7 +63,7 @@ class GetProjects(APInterface):
             """ % (owner_name, project_number, f', after: "{cursor}"' if cursor else "")
 
 
-            response = requests.post(url, json={'query': query}, headers=headers)
+            response = yield ("graphql", url, query, headers)
             if response.status_code != 200:
                 raise requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
             
@@ -106,8 +107,4 @@ class GetProjects(APInterface):
             else:
                 break
 
-        if "project" in data:
-            data["project"].update(project)
-        else:
-            data["project"] = project
-        return data
+        return {"project": project}
@@ -0,0 +1,68 @@
+from .APInterface import APInterface, GRAPHQL_URL
+
+class GetPullRequestCounts(APInterface):
+    # Estratègia "counts": els totals surten de totalCount. La cerca no pot filtrar per qui ha fet
+    # el merge, així que només es baixen les PRs fusionades (autor i mergedBy)
+    provides = "pull_request_counts"
+
+    def merged_query(self, cursor):
+        return """
+                mergedPullRequests: pullRequests(states: MERGED, first: 100%s) {
+                    totalCount
+                    nodes {
+                        author {
+                            login
+                        }
+                        mergedBy {
+                            login
+                        }
+                    }
+                    pageInfo {
+                        hasNextPage
+                        endCursor
+                    }
+                }
+            """ % (f', after: "{cursor}"' if cursor else "")
+
+    def parse_nodes(self, pr_data, counts):
+        for pr in pr_data:
+            author = pr['author']['login'] if pr['author'] else None
+            merged_by = pr['mergedBy']['login'] if pr['mergedBy'] else None
+            if merged_by is not None:
+                counts['merged_by'][merged_by] = counts['merged_by'].get(merged_by, 0) + 1
+            if author != merged_by:
+                counts['not_merged_by_author'] += 1
+        return counts
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        url = GRAPHQL_URL
+        query = """
+        {
+            repository(owner: "%s", name: "%s") {
+                pullRequests {
+                    totalCount
+                }
+                closedPullRequests: pullRequests(states: CLOSED) {
+                    totalCount
+                }
+                %s
+            }
+        }
+        """ % (owner_name, repo_name, self.merged_query(None))
+        repository = (yield from self.graphql(url, query, headers))['repository']
+        merged = repository['mergedPullRequests']
+        counts = {
+            "total": repository['pullRequests']['totalCount'],
+            # Com a la resta de mètriques, les PRs fusionades no compten com a tancades
+            "closed": repository['closedPullRequests']['totalCount'],
+            "merged": merged['totalCount'],
+            "merged_by": {},
+            "not_merged_by_author": 0
+        }
+        while True:
+            self.parse_nodes(merged['nodes'], counts)
+            if not merged['pageInfo']['hasNextPage']:
+                break
+            query = '{ repository(owner: "%s", name: "%s") { %s } }' % (owner_name, repo_name, self.merged_query(merged['pageInfo']['endCursor']))
+            merged = (yield from self.graphql(url, query, headers))['repository']['mergedPullRequests']
+        return {"pull_request_counts": {repo_name: counts}}
@@ -1,15 +1,12 @@
-from .APInterface import APInterface
+from .APInterface import APInterface, GRAPHQL_URL
 import requests
+from .RecordTable import PullRequestTable
 
 class GetPullRequests(APInterface):
-    def execute(self, owner_name, repo_name, headers, project_number, data: dict) -> dict:
-        url = "https://api.github.com/graphql"
-        cursor = None
-        pull_requests = {}
-        while True:
-            query = """
-            {
-            repository(owner: "%s", name: "%s") {
+    provides = "pull_requests"
+
+    def connection_query(self, cursor):
+        return """
                 pullRequests(first: 100%s) {
                 nodes {
                     id
@@ -18,6 +15,9 @@ class GetPullRequests(APInterface):
                     }
                     state
                     merged
+                    createdAt
+                    closedAt
+                    mergedAt
                     mergedBy {
                     login
                     }
@@ -27,30 +27,51 @@ class GetPullRequests(APInterface):
                     endCursor
                 }
                 }
+            """ % (f', after: "{cursor}"' if cursor else "")
+
+    def parse_nodes(self, pr_data, pull_requests):
+        for pr in pr_data:
+            pr_id = pr['id']
+            author = pr["author"]["login"]
+            state = pr['state']
+            merged = pr['merged']
+            merged_by = pr['mergedBy']['login'] if merged else None
+            created_at = pr['createdAt'][:10] if pr['createdAt'] else None
+            closed_at = pr['closedAt'][:10] if pr['closedAt'] else None
+            merged_at = pr['mergedAt'][:10] if pr['mergedAt'] else None
+
+            pull_requests.add(pr_id,
+                state=state,
+                author=author,
+                merged=merged,
+                merged_by=merged_by,
+                created_at=created_at,
+                closed_at=closed_at,
+                merged_at=merged_at
+            )
+        return pull_requests
+
+    def fetch(self, owner_name, repo_name, headers, project_number, data: dict):
+        url = GRAPHQL_URL
+        cursor = None
+        pull_requests = PullRequestTable()
+        while True:
+            query = """
+            {
+            repository(owner: "%s", name: "%s") {
+                %s
             }
             }
-            """ % (owner_name, repo_name, f', after: "{cursor}"' if cursor else "")
+            """ % (owner_name, repo_name, self.connection_query(cursor))
 
-            response = requests.post(url, json={'query': query}, headers=headers)
+            response = yield ("graphql", url, query, headers)
             if response.status_code != 200:
                 raise  requests.RequestException(f"Error al fer la trucada a {self.__class__.__name__}: {response.status_code}")
             data_graphql = response.json()
             if 'data' in data_graphql:
                 pr_data = data_graphql['data']['repository']['pullRequests']['nodes']
                 page_info = data_graphql['data']['repository']['pullRequests']['pageInfo']
-                for pr in pr_data:
-                    pr_id = pr['id']
-                    author = pr["author"]["login"]
-                    state = pr['state']
-                    merged = pr['merged']
-                    merged_by = pr['mergedBy']['login'] if merged else None
-
-                    pull_requests[pr_id] = {
-                        "state": state,
-                        "author": author,
-                        "merged": merged,
-                        "merged_by": merged_by
-                    }
+                self.parse_nodes(pr_data, pull_requests)
                 if page_info['hasNextPage']:
                     cursor = page_info['endCursor']
                 else:
@@ -58,8 +79,4 @@ class GetPullRequests(APInterface):
             else:
                 break
 
-        if "pull_requests" in data:
-            data["pull_requests"].update(pull_requests)
-        else:
-            data["pull_requests"] = pull_requests
-        return data
\ No newline at end of file
+        return {"pull_requests": pull_requests}
\ No newline at end of file
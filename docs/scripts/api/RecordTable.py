@@ -0,0 +1,284 @@
+import threading
+from array import array
+from collections.abc import Mapping
+from datetime import date
+
+STRING = "string"
+INT = "int"
+FLAG = "flag"
+DAY = "day"
+TYPECODES = {STRING: "i", INT: "i", FLAG: "b", DAY: "i"}
+EMPTY = -1
+# Percentatge màxim d'ocupació de l'índex abans de fer-lo créixer
+MAX_LOAD = 0.66
+
+class Interner:
+    # Cada text diferent (autor, estat...) es guarda un sol cop; els registres en guarden l'índex
+    def __init__(self):
+        self.ids = {}
+        self.labels = []
+        self.lock = threading.Lock()
+
+    def id(self, value):
+        value_id = self.ids.get(value, EMPTY)
+        if value_id == EMPTY:
+            with self.lock:
+                value_id = self.ids.get(value, EMPTY)
+                if value_id == EMPTY:
+                    value_id = len(self.labels)
+                    self.labels.append(value)
+                    self.ids[value] = value_id
+        return value_id
+
+# Una sola taula per a totes les columnes de text: els codis són comparables entre taules
+strings = Interner()
+_ordinals = {}
+_days = {}
+
+def day_ordinal(day):
+    if day is None:
+        return EMPTY
+    ordinal = _ordinals.get(day)
+    if ordinal is None:
+        ordinal = _ordinals.setdefault(day, date.fromisoformat(day).toordinal())
+    return ordinal
+
+def ordinal_day(ordinal):
+    if ordinal == EMPTY:
+        return None
+    day = _days.get(ordinal)
+    if day is None:
+        day = _days.setdefault(ordinal, date.fromordinal(ordinal).isoformat())
+    return day
+
+def encode_flag(value):
+    return 2 if value is None else int(value)
+
+def encode_int(value):
+    return value
+
+ENCODERS = {STRING: strings.id, INT: encode_int, FLAG: encode_flag, DAY: day_ordinal}
+
+def decode(kind, value):
+    if kind == STRING:
+        return strings.labels[value]
+    if kind == FLAG:
+        return None if value == 2 else bool(value)
+    if kind == DAY:
+        return ordinal_day(value)
+    return value
+
+class Record(Mapping):
+    # Vista d'una fila: es llegeix com el dict que guardaven abans els fetchers
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, name):
+        kind = self.table.kinds.get(name)
+        if kind is None:
+            raise KeyError(name)
+        return decode(kind, self.table.columns[name][self.row])
+
+    def __iter__(self):
+        return iter(self.table.kinds)
+
+    def __len__(self):
+        return len(self.table.kinds)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class RecordTable(Mapping):
+    # Registres guardats per columnes en arrays compactes, amb un índex de claus
+    # d'adreçament obert (també un array) en lloc d'un dict de dicts
+    fields = ()
+
+    def __init__(self):
+        self.kinds = dict(self.fields)
+        self.encoders = [(name, ENCODERS[kind]) for name, kind in self.fields]
+        self.columns = {name: array(TYPECODES[kind]) for name, kind in self.fields}
+        self.column_list = list(self.columns.values())
+        self.keys_data = bytearray()
+        self.offsets = array("q", [0])
+        self.index = array("i", [EMPTY]) * 8
+        self.size = 0
+
+    # Les claus es guarden com a bytes; les subclasses poden triar una codificació més compacta
+    def encode_key(self, key):
+        return key.encode()
+
+    def decode_key(self, key):
+        return key.decode()
+
+    def key_at(self, row):
+        return bytes(self.keys_data[self.offsets[row]:self.offsets[row + 1]])
+
+    def key_equals(self, row, key):
+        return self.keys_data[self.offsets[row]:self.offsets[row + 1]] == key
+
+    def append_key(self, key):
+        self.keys_data += key
+        self.offsets.append(len(self.keys_data))
+
+    def find(self, key):
+        mask = len(self.index) - 1
+        slot = hash(key) & mask
+        while True:
+            row = self.index[slot]
+            if row == EMPTY or self.key_equals(row, key):
+                return slot, row
+            slot = (slot + 1) & mask
+
+    def grow(self):
+        self.reindex(len(self.index) * 2)
+
+    def reindex(self, capacity):
+        self.index = array("i", [EMPTY]) * capacity
+        mask = len(self.index) - 1
+        for row in range(self.size):
+            slot = hash(self.key_at(row)) & mask
+            while self.index[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            self.index[slot] = row
+
+    def put(self, key, values):
+        # `values` ja codificats, en l'ordre de `fields`. Si la clau ja hi és se sobreescriu, com en un dict
+        slot, row = self.find(key)
+        if row != EMPTY:
+            for column, value in zip(self.column_list, values):
+                column[row] = value
+            return False
+        self.index[slot] = self.size
+        self.append_key(key)
+        for column, value in zip(self.column_list, values):
+            column.append(value)
+        self.size += 1
+        if self.size > len(self.index) * MAX_LOAD:
+            self.grow()
+        return True
+
+    def add(self, key, **values):
+        return self.put(self.encode_key(key), [encoder(values[name]) for name, encoder in self.encoders])
+
+    def __setitem__(self, key, record):
+        self.put(self.encode_key(key), [encoder(record[name]) for name, encoder in self.encoders])
+
+    def __getitem__(self, key):
+        _, row = self.find(self.encode_key(key))
+        if row == EMPTY:
+            raise KeyError(key)
+        return Record(self, row)
+
+    def __contains__(self, key):
+        return self.find(self.encode_key(key))[1] != EMPTY
+
+    def __iter__(self):
+        for row in range(self.size):
+            yield self.decode_key(self.key_at(row))
+
+    def __len__(self):
+        return self.size
+
+    # Es recorre per files, sense tornar a buscar cada clau a l'índex
+    def items(self):
+        for row in range(self.size):
+            yield self.decode_key(self.key_at(row)), Record(self, row)
+
+    def values(self):
+        for row in range(self.size):
+            yield Record(self, row)
+
+    def column(self, name):
+        return self.columns[name]
+
+    def update(self, other):
+        if type(other) is not type(self):
+            for key, record in other.items():
+                self[key] = record
+            return
+        columns = other.column_list
+        for row in range(other.size):
+            self.put(other.key_at(row), [column[row] for column in columns])
+
+    def subset(self, keys):
+        # Taula nova només amb les files de `keys` (claus ja codificades), sense descodificar els valors
+        table = type(self)()
+        columns = self.column_list
+        for row in range(self.size):
+            key = self.key_at(row)
+            if key in keys:
+                table.put(key, [column[row] for column in columns])
+        return table
+
+    def copy(self):
+        table = type(self)()
+        table.columns = {name: array(column.typecode, column) for name, column in self.columns.items()}
+        table.column_list = list(table.columns.values())
+        table.keys_data = bytearray(self.keys_data)
+        table.offsets = array("q", self.offsets)
+        table.index = array("i", self.index)
+        table.size = self.size
+        return table
+
+    def __reduce__(self):
+        # Per passar la taula a un altre procés (col·lectors en un pool de processos): els codis de
+        # text només tenen sentit amb la taula d'strings d'aquest procés, que també s'hi envia.
+        # L'índex no: els slots surten de hash(), que en un altre procés té una altra llavor
+        state = (self.columns, self.keys_data, self.offsets, self.size)
+        return (restore_table, (type(self), state, strings.labels[:]))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} registres)"
+
+def restore_table(table_class, state, labels):
+    table = table_class()
+    columns, table.keys_data, table.offsets, table.size = state
+    capacity = len(table.index)
+    while table.size > capacity * MAX_LOAD:
+        capacity *= 2
+    table.reindex(capacity)
+    # Els codis es tradueixen a la taula d'strings del procés que rep la taula
+    mapping = array("i", map(strings.id, labels))
+    for name, kind in table.fields:
+        if kind == STRING:
+            columns[name] = array("i", map(mapping.__getitem__, columns[name]))
+    table.columns = columns
+    table.column_list = list(columns.values())
+    return table
+
+class CommitTable(RecordTable):
+    fields = (("author", STRING), ("additions", INT), ("deletions", INT), ("modified", INT), ("date", DAY), ("merge", FLAG))
+
+    # Els SHA es guarden en binari: 20 bytes en lloc d'un text de 40 caràcters
+    def encode_key(self, key):
+        return bytes.fromhex(key)
+
+    def decode_key(self, key):
+        return key.hex()
+
+    def key_at(self, row):
+        return bytes(self.keys_data[row * 20:row * 20 + 20])
+
+    def key_equals(self, row, key):
+        return self.keys_data[row * 20:row * 20 + 20] == key
+
+    def append_key(self, key):
+        self.keys_data += key
+
+class IssueTable(RecordTable):
+    fields = (("state", STRING), ("assignee", STRING), ("has_pull_request", FLAG), ("pr_author_is_assignee", FLAG),
+              ("created_at", DAY), ("closed_at", DAY))
+
+class PullRequestTable(RecordTable):
+    fields = (("state", STRING), ("author", STRING), ("merged", FLAG), ("merged_by", STRING),
+              ("created_at", DAY), ("closed_at", DAY), ("merged_at", DAY))
+
+# Claus de `data` que es guarden en taules compactes
+TABLES = {
+    "commits": CommitTable,
+    "issues": IssueTable,
+    "pull_requests": PullRequestTable
+}
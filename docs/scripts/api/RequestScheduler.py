@@ -0,0 +1,232 @@
+import asyncio
+import concurrent.futures
+import functools
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from tracing import tracer
+from .ResponseCache import ResponseCache
+
+MAX_CONCURRENCY = 16
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+REQUEST_TIMEOUT = 60
+# Per sota d'aquest pressupost restant les trucades es fan d'una en una
+LOW_BUDGET = 100
+RETRY_STATUS = (429, 500, 502, 503, 504)
+RATE_LIMIT_QUERY = "rateLimit { cost remaining resetAt }"
+
+class RateLimitError(requests.RequestException):
+    pass
+
+def create_session(pool_size):
+    # Una sola sessió amb keep-alive: les pàgines reutilitzen les connexions TCP+TLS
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class RequestScheduler:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES, session=None, response_cache=None):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.limit = max_concurrency
+        self.session = session or create_session(max_concurrency)
+        self.executor = None
+        self.response_cache = response_cache or ResponseCache()
+        self.active = 0
+        self.paused_until = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+        self.budget = {}
+        self.stats = {
+            "requests": 0,
+            "rest_requests": 0,
+            "graphql_requests": 0,
+            "graphql_cost": 0,
+            "retries": 0,
+            "not_modified": 0,
+            "rate_limited": 0,
+            "waited_seconds": 0.0
+        }
+
+    def resize(self, max_concurrency):
+        # El pool de connexions té tantes connexions com trucades simultànies permeses
+        with self.condition:
+            self.max_concurrency = max_concurrency
+            self.limit = min(self.limit, max_concurrency)
+            self.session = create_session(max_concurrency)
+            self.executor = None
+            self.condition.notify_all()
+
+    def acquire(self):
+        with self.condition:
+            start = time.monotonic()
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.active < self.limit:
+                    self.active += 1
+                    self.stats["waited_seconds"] += time.monotonic() - start
+                    return
+                self.condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def pause(self, seconds):
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            # Rebaixem la concurrència (AIMD) quan GitHub ens frena
+            self.limit = max(1, self.limit // 2)
+            self.stats["rate_limited"] += 1
+            self.condition.notify_all()
+
+    def update_budget(self, response):
+        resource = response.headers.get("X-RateLimit-Resource", "core")
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        remaining = int(remaining)
+        with self.condition:
+            self.budget[resource] = {
+                "limit": int(response.headers.get("X-RateLimit-Limit", 0)),
+                "remaining": remaining,
+                "reset": int(response.headers.get("X-RateLimit-Reset", 0))
+            }
+            if remaining <= LOW_BUDGET:
+                self.limit = 1
+            else:
+                self.successes += 1
+                if self.successes % 10 == 0 and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self.condition.notify_all()
+
+    def retry_delay(self, response, attempt):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after is not None:
+                return float(retry_after)
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                return max(0.0, int(response.headers.get("X-RateLimit-Reset", 0)) - time.time()) + 1
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def is_rate_limited(self, response):
+        if response.status_code == 429:
+            return True
+        if response.status_code == 403:
+            return ("Retry-After" in response.headers
+                    or response.headers.get("X-RateLimit-Remaining") == "0"
+                    or "rate limit" in response.text.lower())
+        return False
+
+    def graphql_errors_rate_limited(self, data_graphql):
+        return any(error.get("type") == "RATE_LIMITED" for error in data_graphql.get("errors", []) or [])
+
+    def request(self, method, url, graphql=False, **kwargs):
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            finally:
+                self.release()
+            with self.condition:
+                self.stats["requests"] += 1
+                self.stats["graphql_requests" if graphql else "rest_requests"] += 1
+
+            if response is not None:
+                tracer.count(requests=1, bytes=len(response.content))
+                self.update_budget(response)
+                rate_limited = self.is_rate_limited(response)
+                if not rate_limited and graphql and response.status_code == 200:
+                    data_graphql = response.json()
+                    rate_limit = (data_graphql.get("data") or {}).get("rateLimit")
+                    if rate_limit:
+                        with self.condition:
+                            self.stats["graphql_cost"] += rate_limit["cost"]
+                        tracer.count(graphql_cost=rate_limit["cost"])
+                    rate_limited = self.graphql_errors_rate_limited(data_graphql)
+                if not rate_limited and response.status_code not in RETRY_STATUS:
+                    return response
+                if attempt >= self.max_retries:
+                    if rate_limited:
+                        raise RateLimitError(f"Límit de peticions esgotat després de {attempt} reintents: {url}")
+                    return response
+                delay = self.retry_delay(response, attempt)
+                if rate_limited:
+                    self.pause(delay)
+                else:
+                    time.sleep(delay)
+            else:
+                tracer.count(requests=1)
+                time.sleep(self.retry_delay(None, attempt))
+            attempt += 1
+            with self.condition:
+                self.stats["retries"] += 1
+
+    def get(self, url, headers=None, **kwargs):
+        # Peticions condicionals: si el recurs no ha canviat GitHub respon 304,
+        # que no compta per al límit, i es fa servir el cos guardat
+        cached = self.response_cache.load(url, headers)
+        response = self.request("GET", url, headers=self.response_cache.conditional_headers(cached, headers), **kwargs)
+        if response.status_code == 304 and cached is not None:
+            with self.condition:
+                self.stats["not_modified"] += 1
+            tracer.count(pages=1, not_modified=1)
+            return self.response_cache.restore(cached, response)
+        if response.status_code == 200:
+            tracer.count(pages=1)
+            self.response_cache.store(url, headers, response)
+        return response
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        return self.request("POST", url, json=json, headers=headers, **kwargs)
+
+    def graphql(self, url, query, headers=None, **kwargs):
+        # Afegim rateLimit a la consulta per saber-ne el cost real
+        query = query.rstrip()
+        query = query[:-1] + RATE_LIMIT_QUERY + "\n}"
+        response = self.request("POST", url, graphql=True, json={'query': query}, headers=headers, **kwargs)
+        if response.status_code == 200:
+            tracer.count(pages=1)
+        return response
+
+    def get_all(self, urls, headers=None):
+        if not urls:
+            return []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(urls), self.max_concurrency)) as executor:
+            return list(executor.map(tracer.bind(lambda url: self.get(url, headers=headers)), urls))
+
+    def call(self, method, *args):
+        return getattr(self, method)(*args)
+
+    async def call_async(self, method, *args):
+        # Les trucades bloquejants s'executen en un pool de la mida del límit global;
+        # la paginació continua com a corrutina al bucle d'esdeveniments
+        if method == "get_all":
+            urls, headers = args
+            return list(await asyncio.gather(*(self.call_async("get", url, headers) for url in urls)))
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, tracer.bind(functools.partial(getattr(self, method), *args)))
+
+    def report(self) -> dict:
+        with self.condition:
+            report = dict(self.stats)
+            report["waited_seconds"] = round(report["waited_seconds"], 2)
+            report["budget"] = {resource: dict(budget) for resource, budget in self.budget.items()}
+        return report
+
+scheduler = RequestScheduler()
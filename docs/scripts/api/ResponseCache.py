@@ -0,0 +1,75 @@
+import os
+import json
+import hashlib
+import threading
+
+CACHE_DIR = os.getenv("METRICS_CACHE_DIR", ".cache")
+
+class ResponseCache:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "http")
+        # Authorization -> nom estable de la credencial (el del secret, no el valor)
+        self.identities = {}
+        # Claus demanades en aquesta execució: la resta es poden esborrar
+        self.used = set()
+
+    def identify(self, headers, name):
+        self.identities[(headers or {}).get("Authorization", "")] = name
+
+    def key(self, url, headers):
+        # Dues credencials poden veure continguts diferents, però la clau no pot dependre del valor
+        # del token: GITHUB_TOKEN canvia a cada execució i no hi hauria mai cap 304. Les
+        # credencials sense nom es distingeixen pel token
+        authorization = (headers or {}).get("Authorization", "")
+        identity = self.identities.get(authorization, authorization)
+        key = hashlib.sha256(f"{identity}\n{url}".encode()).hexdigest()
+        self.used.add(key)
+        return key
+
+    def load(self, url, headers):
+        path = os.path.join(self.path, f"{self.key(url, headers)}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, ValueError):
+            return None
+
+    def store(self, url, headers, response):
+        etag = response.headers.get("ETag")
+        if not etag:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, f"{self.key(url, headers)}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "etag": etag,
+                "link": response.headers.get("Link"),
+                "body": response.text
+            }, f)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        # Després d'una execució completa: fora les respostes que ja no s'han demanat (repositoris o
+        # branques que ja no hi són, claus antigues). Si no, actions/cache les desaria per sempre
+        if not os.path.isdir(self.path):
+            return
+        for name in os.listdir(self.path):
+            if name.split(".", 1)[0] not in self.used:
+                os.remove(os.path.join(self.path, name))
+
+    def conditional_headers(self, cached, headers):
+        if cached is None:
+            return headers
+        return {**(headers or {}), "If-None-Match": cached["etag"]}
+
+    def restore(self, cached, response):
+        # Una resposta 304 es converteix en la 200 que teníem guardada
+        response.status_code = 200
+        response._content = cached["body"].encode()
+        response.encoding = "utf-8"
+        if cached.get("link"):
+            response.headers["Link"] = cached["link"]
+        return response
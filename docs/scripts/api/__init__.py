@@ -1,12 +1,38 @@
 import pkgutil
 import importlib
+from .Declarations import Declarations
 
+# Cada mòdul Get*.py del paquet és un fetcher: n'hi ha prou d'afegir-ne un de nou. Els fetchers es
+# trien per les seves declaracions (`provides`, `scope` i `source`, vegeu APInterface), que es
+# llegeixen del codi font: només s'importen els mòduls dels fetchers que s'executen
+MODULES = [module_name for _, module_name, _ in pkgutil.iter_modules(__path__) if module_name.startswith("Get")]
+declarations = Declarations(__path__[0], MODULES, "APInterface")
 
-for _, module_name, _ in pkgutil.iter_modules(__path__):
-    module = importlib.import_module(f"{__name__}.{module_name}")
+def load(name):
+    # El mòdul sol dir-se com la classe, però no sempre (GetProjects és a GetProject.py)
+    if name not in declarations.classes():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, _ = declarations.classes()[name]
+    fetcher = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    # Si el submòdul ja s'havia importat (p. ex. des de BatchQuery), l'atribut era el mòdul
+    globals()[name] = fetcher
+    return fetcher
 
-    for attribute_name in dir(module):  
-        attribute = getattr(module, attribute_name)
+def select(condition):
+    return [load(name) for name, (_, fetcher) in declarations.classes().items() if condition(fetcher)]
 
-        if isinstance(attribute, type) and attribute_name.startswith("Get"):
-            globals()[attribute_name] = attribute
+def repo_fetchers(keys, sources=None):
+    # Fetchers de cada repositori que proporcionen `keys`, de la font triada per a cada clau
+    # (p. ex. {"commits": "git"}; per defecte, l'API)
+    sources = sources or {}
+    return select(lambda fetcher: fetcher.scope == "repo" and fetcher.provides in keys
+                  and fetcher.source == sources.get(fetcher.provides, "api"))
+
+def global_fetchers(keys):
+    # Fetchers que no van per repositori: s'executen un sol cop, quan ja es coneixen els membres
+    return select(lambda fetcher: fetcher.scope == "global" and fetcher.provides in keys)
+
+def __getattr__(name):
+    if name.startswith("Get"):
+        return load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from .GitHubStandIn import GitHubStandIn
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("threads", "async", "false")
+# "cold": sense cap memòria cau; "warm": la mateixa carpeta un altre cop (ETags, commits i base de dades)
+RUNS = ("cold", "warm")
+# FETCH_STRATEGY de metrics.py: baixar totes les issues i PRs o demanar-ne els recomptes
+STRATEGIES = ("nodes", "counts")
+RESULT_PREFIX = "BENCHMARK_RESULT "
+# Variables del workflow que no han d'arribar a les execucions mesurades
+CLEARED_ENV = ("GITHUB_OUTPUT", "GITHUB_EVENT_NAME", "GITHUB_EVENT_PATH", "METRICS_CACHE_DIR", "COMMITS_FULL_SYNC")
+
+def measure():
+    # S'executa dins del procés fill, a la carpeta de treball: metrics.py llegeix la configuració en importar-se
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    start = time.perf_counter()
+    import metrics
+    metrics.get_metrics()
+    wall = time.perf_counter() - start
+    peak = None
+    if resource is not None:
+        # ru_maxrss és en KB a Linux i en bytes a macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    print(RESULT_PREFIX + json.dumps({
+        "wall_seconds": round(wall, 3),
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "scheduler": metrics.scheduler.report()
+    }))
+
+class Benchmark:
+    # Executa metrics.py (get_metrics) contra el servidor de proves per a cada estratègia i mode de
+    # paral·lelisme, cada execució en un procés nou i en una carpeta de treball temporal
+    def __init__(self, org=None, cassette=None, owner=None, repo=None, scope="org", modes=MODES, runs=RUNS,
+                 latency=0.0, jitter=0.0, rate_limit=None, rate_window=60, concurrency_limit=None, strategies=("nodes",)):
+        if org is None and cassette is None:
+            raise ValueError("Cal una organització sintètica o un cassette")
+        self.org = org
+        self.cassette = cassette
+        self.owner = owner or org.name
+        self.repo = repo or (next(iter(org.repos)) if org is not None else None)
+        self.scope = scope
+        self.modes = modes
+        self.runs = runs
+        self.strategies = strategies
+        self.standin_options = {
+            "latency": latency,
+            "jitter": jitter,
+            "rate_limit": rate_limit,
+            "rate_window": rate_window,
+            "concurrency_limit": concurrency_limit
+        }
+
+    def prepare(self, workdir):
+        # Mateixa estructura que el repositori: metrics.py s'executa a docs/scripts i escriu a docs/
+        scripts = os.path.join(workdir, "docs", "scripts")
+        os.makedirs(scripts)
+        with open(os.path.join(workdir, "docs", "config.json"), "w") as f:
+            json.dump({
+                "metrics_scope": self.scope,
+                "members": "org" if self.scope == "org" else "repo",
+                "excluded_members": [],
+                "excluded_repos": []
+            }, f)
+        return scripts
+
+    def environment(self, standin, mode, strategy):
+        env = {name: value for name, value in os.environ.items() if name not in CLEARED_ENV}
+        env.update(standin.environment())
+        env.update({
+            "GITHUB_TOKEN": "benchmark",
+            "ORG_TOKEN": "benchmark",
+            "GITHUB_REPOSITORY": f"{self.owner}/{self.repo}",
+            "PARALLELISM": mode,
+            "FETCH_STRATEGY": strategy,
+            "PYTHONPATH": os.pathsep.join(filter(None, [SCRIPTS_DIR, os.environ.get("PYTHONPATH")]))
+        })
+        return env
+
+    def run_once(self, standin, scripts, mode, run, strategy):
+        standin.reset_stats()
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, "-m", "benchmark", "measure"], cwd=scripts,
+                                 env=self.environment(standin, mode, strategy), capture_output=True, text=True)
+        total = time.perf_counter() - start
+        if process.returncode != 0:
+            raise RuntimeError(f"L'execució {strategy}/{mode}/{run} ha fallat:\n{process.stderr}")
+        lines = [line for line in process.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+        result = json.loads(lines[-1][len(RESULT_PREFIX):])
+        return {
+            "strategy": strategy,
+            "mode": mode,
+            "run": run,
+            "wall_seconds": result["wall_seconds"],
+            "process_seconds": round(total, 3),
+            "peak_rss_mb": result["peak_rss_mb"],
+            "server": standin.report(),
+            "scheduler": result["scheduler"]
+        }
+
+    def run(self) -> list:
+        results = []
+        with GitHubStandIn(org=self.org, cassette=self.cassette, **self.standin_options) as standin:
+            for strategy in self.strategies:
+                for mode in self.modes:
+                    workdir = tempfile.mkdtemp(prefix=f"metrics-benchmark-{strategy}-{mode}-")
+                    try:
+                        scripts = self.prepare(workdir)
+                        for run in self.runs:
+                            results.append(self.run_once(standin, scripts, mode, run, strategy))
+                    finally:
+                        shutil.rmtree(workdir, ignore_errors=True)
+        return results
+
+def format_results(results) -> str:
+    header = f"{'strategy':<8} {'mode':<8} {'run':<5} {'wall s':>8} {'requests':>9} {'rest':>6} {'graphql':>8} {'cost':>6} {'304':>6} {'limited':>8} {'MB sent':>8} {'peak MB':>8}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        server = result["server"]
+        peak = result["peak_rss_mb"]
+        lines.append(f"{result['strategy']:<8} {result['mode']:<8} {result['run']:<5} {result['wall_seconds']:>8.2f} {server['requests']:>9} "
+                     f"{server['rest_requests']:>6} {server['graphql_requests']:>8} {server['graphql_cost']:>6} "
+                     f"{server['not_modified']:>6} {server['rate_limited']:>8} {server['bytes_sent'] / 1e6:>8.2f} "
+                     f"{peak if peak is not None else '-':>8}")
+    return "\n".join(lines)
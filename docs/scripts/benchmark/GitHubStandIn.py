@@ -0,0 +1,530 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import requests
+
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+# Capçaleres de GitHub que es guarden en gravar i es tornen en reproduir
+RECORDED_HEADERS = ("Content-Type", "ETag", "Link", "X-RateLimit-Limit", "X-RateLimit-Remaining",
+                    "X-RateLimit-Reset", "X-RateLimit-Resource", "Retry-After")
+REPO_RE = re.compile(r'(?:(\w+)\s*:\s*)?repository\(owner:\s*"([^"]+)",\s*name:\s*"([^"]+)"\)')
+CONNECTION_RE = r'%s\(first:\s*(\d+)(?:,\s*after:\s*"([^"]*)")?\)'
+ORGANIZATION_RE = re.compile(r'organization\(login:\s*"([^"]+)"\)')
+REF_RE = re.compile(r'ref\(qualifiedName:\s*"refs/heads/([^"]+)"\)')
+# Connexions d'issues i PRs d'un repositori, amb àlies i arguments opcionals (states:, first:, after:)
+FIELD_RE = re.compile(r'(?:(\w+)\s*:\s*)?\b(issues|pullRequests)(?:\(([^)]*)\))?\s*\{')
+OBJECT_RE = re.compile(r'(?:(\w+)\s*:\s*)?\bobject\(oid:\s*"([0-9a-f]+)"\)')
+SEARCH_RE = re.compile(r'(?:(\w+)\s*:\s*)?\bsearch\(([^)]*)\)')
+ARGUMENT_RE = re.compile(r'(\w+):\s*(\[[^\]]*\]|"[^"]*"|\w+)')
+# Com GitHub, la cerca no retorna més de 1.000 nodes (issueCount sí que és el total)
+SEARCH_LIMIT = 1000
+# Peticions que fa GitHub per omplir cada pàgina de cada connexió (la pàgina i les subconnexions
+# first: 1 de cada node); el cost és la suma dividida per 100, com el que retorna rateLimit
+CONNECTION_REQUESTS = {"issues": 201, "pullRequests": 1, "history": 101, "search": 201}
+# Qualificadors de la cerca que entén el servidor, per a issues i per a PRs
+ISSUE_FILTERS = {
+    "is:open": lambda issue, value: issue[1] == "OPEN",
+    "is:closed": lambda issue, value: issue[1] == "CLOSED",
+    "assignee": lambda issue, value: value in issue[4],
+    "no:assignee": lambda issue, value: not issue[4],
+    "linked:pr": lambda issue, value: issue[5] is not None
+}
+PULL_REQUEST_FILTERS = {
+    "is:open": lambda pull_request, value: pull_request[2] == "OPEN",
+    "is:closed": lambda pull_request, value: pull_request[2] != "OPEN",
+    "is:merged": lambda pull_request, value: pull_request[2] == "MERGED",
+    "author": lambda pull_request, value: pull_request[1] == value
+}
+
+def encode_cursor(offset):
+    return base64.b64encode(f"cursor:{offset}".encode()).decode()
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    return int(base64.b64decode(cursor).decode().split(":")[1])
+
+def arguments(text):
+    return {name: value.strip('"') for name, value in ARGUMENT_RE.findall(text or "")}
+
+def page(items, first, after):
+    offset = decode_cursor(after)
+    selected = items[offset:offset + min(int(first), MAX_PER_PAGE)]
+    end = offset + len(selected)
+    return selected, {"hasNextPage": end < len(items), "endCursor": encode_cursor(end) if selected else None}
+
+def normalize_query(query):
+    return " ".join(query.split())
+
+def cassette_key(method, path, body=b""):
+    # Les consultes GraphQL es distingeixen pel text de la consulta (sense espais sobrers)
+    if method == "POST":
+        query = normalize_query(json.loads(body or b"{}").get("query", ""))
+        return f"POST {path} {hashlib.sha256(query.encode()).hexdigest()}"
+    return f"{method} {path}"
+
+class RateLimit:
+    # Límit primari per finestra (com X-RateLimit-*) i, opcionalment, un màxim de peticions
+    # simultànies que GitHub penalitza amb el límit secundari (403 amb Retry-After)
+    def __init__(self, limit=None, window=60, concurrency=None):
+        self.limit = limit
+        self.window = window
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.used = {}
+        self.reset = {}
+        self.active = 0
+
+    def consume(self, resource, amount=1):
+        # Retorna (acceptada, restants, reset)
+        with self.lock:
+            now = time.time()
+            if self.reset.get(resource, 0) <= now:
+                self.reset[resource] = int(now + self.window)
+                self.used[resource] = 0
+            if self.limit is None:
+                return True, 5000, self.reset[resource]
+            if self.used[resource] + amount > self.limit:
+                return False, 0, self.reset[resource]
+            self.used[resource] += amount
+            return True, self.limit - self.used[resource], self.reset[resource]
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            return self.concurrency is None or self.active <= self.concurrency
+
+    def leave(self):
+        with self.lock:
+            self.active -= 1
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 amb Content-Length: el client pot reutilitzar les connexions, com amb GitHub
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.standin.handle(self, "GET")
+
+    def do_POST(self):
+        self.server.standin.handle(self, "POST")
+
+class GitHubStandIn:
+    # Servidor HTTP local que fa de GitHub per als endpoints REST i GraphQL del paquet api.
+    # Tres modes: dades sintètiques (`org`), reproducció d'un cassette gravat (`cassette`) i
+    # gravació (`cassette` + `upstream`), que reenvia les peticions a GitHub i en desa les respostes
+    # (només les 200). Un cassette reprodueix les consultes que s'hi han gravat: les d'una execució
+    # amb memòria cau són diferents i cal gravar-les també
+    def __init__(self, org=None, cassette=None, upstream=None, latency=0.0, jitter=0.0,
+                 rate_limit=None, rate_window=60, concurrency_limit=None, host="127.0.0.1", port=0, seed=1):
+        if org is None and cassette is None:
+            raise ValueError("Cal una organització sintètica o un cassette")
+        self.org = org
+        self.cassette_path = cassette
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.limits = RateLimit(rate_limit, rate_window, concurrency_limit)
+        self.address = (host, port)
+        self.lock = threading.Lock()
+        self.cassette = {}
+        self.recorded_upstream = None
+        if cassette and not self.upstream:
+            with open(cassette, "r") as f:
+                recorded = json.load(f)
+            self.cassette = recorded["responses"]
+            self.recorded_upstream = recorded.get("upstream")
+        self.session = requests.Session() if self.upstream else None
+        self.server = None
+        self.thread = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {
+                "requests": 0,
+                "rest_requests": 0,
+                "graphql_requests": 0,
+                "graphql_cost": 0,
+                "not_modified": 0,
+                "rate_limited": 0,
+                "bytes_sent": 0
+            }
+
+    def report(self) -> dict:
+        with self.lock:
+            return dict(self.stats)
+
+    def count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self) -> dict:
+        # Variables perquè metrics.py faci les trucades a aquest servidor
+        return {"GITHUB_API_URL": self.url, "GITHUB_GRAPHQL_URL": f"{self.url}/graphql"}
+
+    def start(self):
+        self.server = ThreadingHTTPServer(self.address, StandInHandler)
+        self.server.daemon_threads = True
+        self.server.standin = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.upstream and self.cassette_path:
+            self.save()
+
+    def save(self):
+        with self.lock:
+            cassette = {"upstream": self.upstream, "responses": dict(self.cassette)}
+        tmp_path = f"{self.cassette_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cassette, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.cassette_path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, handler, method):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        graphql = method == "POST"
+        self.count(requests=1, **{"graphql_requests" if graphql else "rest_requests": 1})
+        # La latència compta com a temps en curs per al límit de peticions simultànies
+        within_concurrency = self.limits.enter()
+        try:
+            if self.latency or self.jitter:
+                time.sleep(self.latency + self.rng.uniform(0, self.jitter))
+            if not within_concurrency:
+                self.count(rate_limited=1)
+                status, headers, payload = 403, {"Retry-After": "1"}, {"message": "You have exceeded a secondary rate limit."}
+            elif self.upstream:
+                status, headers, payload = self.record(handler, method, body)
+            elif self.org is None:
+                status, headers, payload = self.replay(handler, method, body)
+            else:
+                status, headers, payload = self.synthetic(handler, method, body)
+        finally:
+            self.limits.leave()
+        self.respond(handler, status, headers, payload)
+
+    def respond(self, handler, status, headers, payload):
+        content = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        if status == 200 and "ETag" in headers and handler.headers.get("If-None-Match") == headers["ETag"]:
+            # Com GitHub: una petició condicional que no ha canviat respon 304 sense cos
+            status, content = 304, b""
+            self.count(not_modified=1)
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Type", headers.get("Content-Type", "application/json; charset=utf-8"))
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+        self.count(bytes_sent=len(content))
+
+    def rate_headers(self, resource, remaining, reset):
+        return {
+            "X-RateLimit-Limit": str(self.limits.limit or 5000),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset),
+            "X-RateLimit-Resource": resource
+        }
+
+    def rate_limited(self, resource, reset):
+        self.count(rate_limited=1)
+        return 403, self.rate_headers(resource, 0, reset), {"message": "API rate limit exceeded"}
+
+    # Reproducció i gravació
+    def replay(self, handler, method, body):
+        entry = self.cassette.get(cassette_key(method, handler.path, body))
+        if entry is None:
+            return 404, {}, {"message": f"Cap resposta gravada per a {method} {handler.path}"}
+        headers = dict(entry["headers"])
+        if "Link" in headers and self.recorded_upstream:
+            headers["Link"] = headers["Link"].replace(self.recorded_upstream, self.url)
+        if method == "POST":
+            self.count(graphql_cost=self.recorded_cost(entry["body"]))
+        return entry["status"], headers, entry["body"].encode()
+
+    def recorded_cost(self, body):
+        try:
+            return ((json.loads(body).get("data") or {}).get("rateLimit") or {}).get("cost", 0)
+        except ValueError:
+            return 0
+
+    def record(self, handler, method, body):
+        # Es reenvia la petició tal qual (amb el token del client, que no es desa mai)
+        headers = {name: handler.headers[name] for name in ("Authorization", "Content-Type", "Accept") if handler.headers.get(name)}
+        response = self.session.request(method, f"{self.upstream}{handler.path}", data=body or None, headers=headers)
+        recorded = {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}
+        if response.status_code == 200:
+            with self.lock:
+                self.cassette[cassette_key(method, handler.path, body)] = {
+                    "status": response.status_code,
+                    "headers": recorded,
+                    "body": response.text
+                }
+        if "Link" in recorded:
+            recorded["Link"] = recorded["Link"].replace(self.upstream, self.url)
+        return response.status_code, recorded, response.content
+
+    # Dades sintètiques
+    def synthetic(self, handler, method, body):
+        if method == "POST":
+            return self.graphql(json.loads(body or b"{}").get("query", ""))
+        path = urlparse(handler.path)
+        found = self.rest(path.path)
+        headers = {}
+        if isinstance(found, list):
+            found = self.paginate(path, found, headers)
+        content = json.dumps(found).encode()
+        headers["ETag"] = f'W/"{hashlib.sha1(content).hexdigest()}"'
+        # Les respostes 304 no compten per al límit
+        if found is not None and handler.headers.get("If-None-Match") == headers["ETag"]:
+            return 200, headers, content
+        accepted, remaining, reset = self.limits.consume("core")
+        if not accepted:
+            return self.rate_limited("core", reset)
+        if found is None:
+            return 404, self.rate_headers("core", remaining, reset), {"message": "Not Found"}
+        return 200, {**headers, **self.rate_headers("core", remaining, reset)}, content
+
+    def rest(self, path):
+        org = self.org
+        parts = path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "orgs" and parts[1] == org.name:
+            if parts[2] == "repos":
+                return [{"name": name, "full_name": f"{org.name}/{name}", "default_branch": repo.default_branch}
+                        for name, repo in org.repos.items()]
+            if parts[2] == "members":
+                return [self.user(login) for login in org.members]
+            return None
+        if len(parts) < 3 or parts[0] != "repos" or parts[1] != org.name or parts[2] not in org.repos:
+            return None
+        repo = org.repos[parts[2]]
+        if len(parts) == 3:
+            return {"name": repo.name, "full_name": f"{org.name}/{repo.name}", "default_branch": repo.default_branch}
+        if parts[3:] == ["branches"]:
+            return [{"name": branch, "commit": {"sha": head}} for branch, head in repo.branches.items()]
+        if parts[3:] == ["collaborators"]:
+            return [self.user(login) for login in repo.collaborators]
+        return None
+
+    def user(self, login):
+        return {"login": login, "avatar_url": f"https://avatars.githubusercontent.com/{login}"}
+
+    def paginate(self, path, items, headers):
+        query = parse_qs(path.query)
+        per_page = min(int(query.get("per_page", [DEFAULT_PER_PAGE])[0]), MAX_PER_PAGE)
+        page = int(query.get("page", ["1"])[0])
+        last = max(1, -(-len(items) // per_page))
+        links = []
+        if page < last:
+            links.append(f'<{self.url}{path.path}?per_page={per_page}&page={page + 1}>; rel="next"')
+            links.append(f'<{self.url}{path.path}?per_page={per_page}&page={last}>; rel="last"')
+        if links:
+            headers["Link"] = ", ".join(links)
+        return items[(page - 1) * per_page:page * per_page]
+
+    def graphql(self, query):
+        data = {}
+        errors = []
+        requested = 0
+        blocks = list(REPO_RE.finditer(query))
+        for i, match in enumerate(blocks):
+            alias, owner, name = match.groups()
+            end = blocks[i + 1].start() if i + 1 < len(blocks) else len(query)
+            repo = self.org.repos.get(name) if owner == self.org.name else None
+            if repo is None:
+                data[alias or "repository"] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias or "repository"],
+                               "message": f"Could not resolve to a Repository with the name '{owner}/{name}'."})
+                continue
+            node, cost = self.repository(repo, query[match.end():end])
+            data[alias or "repository"] = node
+            requested += cost
+        for match in SEARCH_RE.finditer(query):
+            alias, text = match.groups()
+            node, cost = self.search(arguments(text))
+            if node is None:
+                errors.append({"type": "INVALID_SEARCH", "path": [alias or "search"], "message": f"Cerca no suportada: {text}"})
+            data[alias or "search"] = node
+            requested += cost
+        organization = ORGANIZATION_RE.search(query)
+        if organization:
+            # Els projectes no es generen: el projecte existeix però és buit
+            data["organization"] = {"projectV2": {"title": "", "items": {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}}}
+            requested += 1
+        cost = max(1, round(requested / 100))
+        accepted, remaining, reset = self.limits.consume("graphql", cost)
+        if not accepted:
+            return self.rate_limited("graphql", reset)
+        self.count(graphql_cost=cost)
+        if "rateLimit" in query:
+            data["rateLimit"] = {"cost": cost, "remaining": remaining,
+                                 "resetAt": datetime.fromtimestamp(reset, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+        payload = {"data": data}
+        if errors:
+            payload["errors"] = errors
+        return 200, self.rate_headers("graphql", remaining, reset), payload
+
+    def connection(self, name, block, items, to_node):
+        match = re.search(CONNECTION_RE % name, block)
+        if match is None:
+            return None, 0
+        selected, page_info = page(items, match.group(1), match.group(2))
+        return ([to_node(item) for item in selected], page_info), CONNECTION_REQUESTS[name]
+
+    def connections(self, block, name, items, to_node, state, assigned=None):
+        # Cada camp `name` del bloc: totalCount dels elements amb l'estat demanat (i, amb
+        # filterBy: {assignee: "*"}, només els que tenen algun assignat) i, si porta first:, la pàgina de nodes
+        fields = {}
+        requested = 0
+        for alias, field, text in FIELD_RE.findall(block):
+            if field != name:
+                continue
+            options = arguments(text)
+            states = options.get("states", "").strip("[]").replace(",", " ").split()
+            selected = [item for item in items if not states or state(item) in states]
+            if assigned is not None and options.get("assignee") == "*":
+                selected = [item for item in selected if assigned(item)]
+            node = {"totalCount": len(selected)}
+            if "first" in options:
+                nodes, page_info = page(selected, options["first"], options.get("after"))
+                node.update({"nodes": [to_node(item) for item in nodes], "pageInfo": page_info})
+                requested += CONNECTION_REQUESTS[name]
+            else:
+                requested += 1
+            fields[alias or field] = node
+        return fields, requested
+
+    def search(self, options):
+        # Cerca d'issues o PRs per qualificadors (repo:, org:, is:, assignee:, author:, linked:)
+        terms = options.get("query", "").split()
+        repos = []
+        for term in terms:
+            if term == f"org:{self.org.name}":
+                repos = list(self.org.repos.values())
+            elif term.startswith(f"repo:{self.org.name}/") and term.split("/", 1)[1] in self.org.repos:
+                repos.append(self.org.repos[term.split("/", 1)[1]])
+        kind = "pr" if "is:pr" in terms else "issue"
+        filters = PULL_REQUEST_FILTERS if kind == "pr" else ISSUE_FILTERS
+        conditions = []
+        for term in terms:
+            if term.startswith(("repo:", "org:")) or term in ("is:issue", "is:pr"):
+                continue
+            # Un qualificador amb "-" al davant exclou els resultats que el compleixen
+            excluded = term.startswith("-")
+            name, _, value = term.lstrip("-").partition(":")
+            condition = filters.get(term.lstrip("-")) or filters.get(name)
+            if condition is None:
+                return None, 1
+            conditions.append((condition, value, excluded))
+        items = [item for repo in repos for item in (repo.pull_requests if kind == "pr" else repo.issues)
+                 if all(condition(item, value) != excluded for condition, value, excluded in conditions)]
+        node = {"issueCount": len(items)}
+        if "first" not in options:
+            return node, 1
+        to_node = self.pull_request_node if kind == "pr" else self.issue_node
+        nodes, page_info = page(items[:SEARCH_LIMIT], options["first"], options.get("after"))
+        node.update({"nodes": [to_node(item) for item in nodes], "pageInfo": page_info})
+        return node, CONNECTION_REQUESTS["search"]
+
+    def repository(self, repo, block):
+        node = {}
+        requested = 0
+        # El que ve després d'una cerca ja no és del repositori
+        block = SEARCH_RE.split(block, maxsplit=1)[0]
+        for name, items, to_node, state, assigned in (
+                ("issues", repo.issues, self.issue_node, lambda issue: issue[1], lambda issue: issue[4]),
+                ("pullRequests", repo.pull_requests, self.pull_request_node, lambda pull_request: pull_request[2], None)):
+            fields, cost = self.connections(block, name, items, to_node, state, assigned)
+            node.update(fields)
+            requested += cost
+        # Autor d'un commit pel seu SHA (el que fa servir GetCommitsGit per saber l'usuari de cada correu)
+        for alias, oid in OBJECT_RE.findall(block):
+            commit = repo.commits.get(oid)
+            node[alias or "object"] = {"author": {"user": {"login": commit[1]} if commit[1] else None}} if commit else None
+            requested += 1
+        ref = REF_RE.search(block)
+        if ref or "defaultBranchRef" in block:
+            branch = ref.group(1) if ref else repo.default_branch
+            head = repo.branches.get(branch)
+            target = None
+            if head:
+                commits = [repo.commits[oid] for oid in repo.history(head)]
+                page, cost = self.connection("history", block, commits, self.commit_edge)
+                target = {"oid": head}
+                if page:
+                    target["history"] = {"edges": page[0], "pageInfo": page[1]}
+                    requested += cost
+            if ref:
+                node["ref"] = {"target": target} if target else None
+            else:
+                node["defaultBranchRef"] = {"name": branch, "target": target} if target else None
+        return node, requested
+
+    def commit_edge(self, commit):
+        oid, author, additions, deletions, committed, parents = commit
+        return {"node": {
+            "oid": oid,
+            "author": {"user": {"login": author}},
+            "additions": additions,
+            "deletions": deletions,
+            "committedDate": committed,
+            "parents": {"totalCount": len(parents), "nodes": [{"oid": parent} for parent in parents]}
+        }}
+
+    def issue_node(self, issue):
+        issue_id, state, created, closed, assignees, pr_author = issue
+        return {
+            "id": issue_id,
+            "state": state,
+            "createdAt": created,
+            "closedAt": closed,
+            "assignees": {"nodes": [{"login": assignee} for assignee in assignees]},
+            "closedByPullRequestsReferences": {
+                "totalCount": 1 if pr_author else 0,
+                "nodes": [{"author": {"login": pr_author}}] if pr_author else []
+            }
+        }
+
+    def pull_request_node(self, pull_request):
+        pr_id, author, state, created, closed, merged_at, merged_by = pull_request
+        return {
+            "id": pr_id,
+            "author": {"login": author},
+            "state": state,
+            "merged": merged_by is not None,
+            "createdAt": created,
+            "closedAt": closed,
+            "mergedAt": merged_at,
+            "mergedBy": {"login": merged_by} if merged_by else None
+        }
@@ -0,0 +1,134 @@
+import hashlib
+import random
+from datetime import date, datetime, time, timedelta
+
+# Autors que no són membres: commits anònims i del bot, que els col·lectors tracten a part
+OUTSIDERS = ("outside-contributor", "github-actions[bot]")
+STATES = ("OPEN", "CLOSED")
+
+def timestamp(day, seconds):
+    return datetime.combine(day, time()) + timedelta(seconds=seconds)
+
+def iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ") if moment else None
+
+class SyntheticRepo:
+    # Un repositori generat: commits com a tuples (oid, autor, additions, deletions, data, oids dels pares),
+    # branques com a oid del cap, issues (amb la tupla dels assignats) i PRs. Les proves poden afegir commits i moure o esborrar
+    # branques: l'historial de cada branca es calcula a partir dels pares
+    def __init__(self, name, default_branch="main"):
+        self.name = name
+        self.default_branch = default_branch
+        self.commits = {}
+        self.branches = {}
+        self.collaborators = []
+        self.issues = []
+        self.pull_requests = []
+        self.histories = {}
+
+    def history(self, head):
+        # Tots els avantpassats del cap, del més recent al més antic (com `history` de GitHub)
+        key = (head, len(self.commits))
+        if key not in self.histories:
+            seen = set()
+            pending = [head]
+            while pending:
+                oid = pending.pop()
+                if oid not in seen:
+                    seen.add(oid)
+                    pending.extend(self.commits[oid][5])
+            self.histories[key] = sorted(seen, key=lambda oid: self.commits[oid][4], reverse=True)
+        return self.histories[key]
+
+class SyntheticOrg:
+    # Organització de mida configurable per al servidor de proves. Amb la mateixa llavor
+    # es generen sempre les mateixes dades, així les mesures de dues execucions són comparables
+    def __init__(self, name="bench-org", repos=10, members=8, branches=3, commits=500, issues=200,
+                 pull_requests=150, start="2024-01-01", days=365, seed=1):
+        self.name = name
+        self.rng = random.Random(seed)
+        self.start = date.fromisoformat(start)
+        self.days = days
+        self.members = [f"member{i}" for i in range(members)]
+        self.repos = {}
+        for i in range(repos):
+            repo = self.build_repo(f"repo{i}", branches, commits, issues, pull_requests)
+            self.repos[repo.name] = repo
+
+    def moment(self, low=0, high=None):
+        # Un instant entre el dia `low` i el dia `high` del període
+        high = self.days - 1 if high is None else high
+        return timestamp(self.start + timedelta(days=self.rng.randint(low, max(low, high))), self.rng.randint(0, 86399))
+
+    def author(self):
+        return self.rng.choice(OUTSIDERS) if self.rng.random() < 0.1 else self.rng.choice(self.members)
+
+    def commit(self, repo, key, when, parents=None):
+        oid = hashlib.sha1(f"{self.name}/{repo.name}/{key}".encode()).hexdigest()
+        # Sense pares explícits, un 8% dels commits són merges; `link` els hi posa en ordenar la branca
+        merges = 2 if self.rng.random() < 0.08 else 1
+        repo.commits[oid] = (oid, self.author(), self.rng.randint(0, 400), self.rng.randint(0, 200), iso(when),
+                             merges if parents is None else tuple(parents))
+        return oid
+
+    def link(self, repo, history):
+        # Cada commit té de primer pare el següent de la llista; el segon pare d'un merge és un commit
+        # més antic de la mateixa llista, així l'historial de la branca no canvia
+        for i, oid in enumerate(history):
+            commit = repo.commits[oid]
+            if isinstance(commit[5], int):
+                parents = history[i + 1:i + 1 + commit[5]]
+                repo.commits[oid] = commit[:5] + (tuple(parents),)
+
+    def build_repo(self, name, branches, commits, issues, pull_requests):
+        repo = SyntheticRepo(name)
+        repo.collaborators = self.rng.sample(self.members, max(1, len(self.members) // 2))
+        # La branca principal s'emporta la major part dels commits; la resta en surten en un punt a l'atzar
+        feature_commits = commits // 3 if branches > 1 else 0
+        main_count = commits - feature_commits
+        step = self.days * 86400 / max(1, main_count)
+        main = []
+        for i in range(main_count):
+            when = timestamp(self.start, int(i * step))
+            main.append(self.commit(repo, f"main-{i}", when))
+        main.reverse()
+        self.link(repo, main)
+        if main:
+            repo.branches[repo.default_branch] = main[0]
+        for b in range(1, branches):
+            count = feature_commits // (branches - 1)
+            fork = self.rng.randint(0, max(0, len(main) - 1))
+            fork_day = int((len(main) - 1 - fork) * step // 86400)
+            own = [self.commit(repo, f"branch{b}-{i}", self.moment(fork_day)) for i in range(count)]
+            own.sort(key=lambda oid: repo.commits[oid][4], reverse=True)
+            self.link(repo, own + main[fork:fork + 1])
+            if own or main:
+                repo.branches[f"feature-{b}"] = (own + main[fork:])[0]
+
+        for i in range(issues):
+            created = self.moment()
+            state = self.rng.choice(STATES)
+            closed = self.moment((created.date() - self.start).days) if state == "CLOSED" else None
+            assignees = (self.rng.choice(self.members),) if self.rng.random() < 0.7 else ()
+            pr_author = self.rng.choice(self.members) if self.rng.random() < 0.4 else None
+            repo.issues.append((f"I_{name}_{i}", state, iso(created), iso(closed), assignees, pr_author))
+
+        for i in range(pull_requests):
+            created = self.moment()
+            state = self.rng.choice(("OPEN", "CLOSED", "MERGED"))
+            finished = self.moment((created.date() - self.start).days) if state != "OPEN" else None
+            # Els col·lectors compten les PRs per membre: els autors són col·laboradors (i, per tant, membres)
+            merged_by = self.rng.choice(repo.collaborators) if state == "MERGED" else None
+            repo.pull_requests.append((f"PR_{name}_{i}", self.rng.choice(repo.collaborators), state,
+                                       iso(created), iso(finished), iso(finished) if merged_by else None, merged_by))
+        return repo
+
+    def size(self) -> dict:
+        return {
+            "repos": len(self.repos),
+            "members": len(self.members),
+            "branches": sum(len(repo.branches) for repo in self.repos.values()),
+            "commits": sum(len(repo.commits) for repo in self.repos.values()),
+            "issues": sum(len(repo.issues) for repo in self.repos.values()),
+            "pull_requests": sum(len(repo.pull_requests) for repo in self.repos.values())
+        }
@@ -0,0 +1,3 @@
+from .SyntheticOrg import SyntheticOrg
+from .GitHubStandIn import GitHubStandIn
+from .Benchmark import Benchmark
@@ -0,0 +1,106 @@
+import argparse
+import json
+import sys
+import time
+from .SyntheticOrg import SyntheticOrg
+from .GitHubStandIn import GitHubStandIn
+from .Benchmark import Benchmark, MODES, RUNS, STRATEGIES, format_results, measure
+
+# Ús (des de docs/scripts):
+#   python -m benchmark run --repos 20 --commits 2000 --latency 0.05
+#   python -m benchmark run --issues 2000 --pull-requests 1500 --strategies nodes,counts --modes threads
+#   python -m benchmark serve --record cassette.json --upstream https://api.github.com
+#   python -m benchmark run --replay cassette.json --owner la-meva-org --repo un-repo
+
+def add_org_arguments(parser):
+    group = parser.add_argument_group("organització sintètica")
+    group.add_argument("--org", default="bench-org")
+    group.add_argument("--repos", type=int, default=10)
+    group.add_argument("--members", type=int, default=8)
+    group.add_argument("--branches", type=int, default=3, help="Branques per repositori")
+    group.add_argument("--commits", type=int, default=500, help="Commits per repositori")
+    group.add_argument("--issues", type=int, default=200, help="Issues per repositori")
+    group.add_argument("--pull-requests", type=int, default=150, help="PRs per repositori")
+    group.add_argument("--seed", type=int, default=1)
+
+def add_server_arguments(parser):
+    group = parser.add_argument_group("servidor")
+    group.add_argument("--replay", metavar="CASSETTE", help="Reprodueix les respostes gravades en lloc de generar-les")
+    group.add_argument("--latency", type=float, default=0.0, help="Segons de latència per petició")
+    group.add_argument("--jitter", type=float, default=0.0, help="Latència addicional aleatòria (0 a JITTER segons)")
+    group.add_argument("--rate-limit", type=int, help="Peticions (o punts de GraphQL) per finestra")
+    group.add_argument("--rate-window", type=int, default=60, help="Durada de la finestra del límit, en segons")
+    group.add_argument("--concurrency-limit", type=int, help="Peticions simultànies abans del límit secundari")
+
+def build_org(args):
+    return SyntheticOrg(args.org, args.repos, args.members, args.branches, args.commits, args.issues,
+                        args.pull_requests, seed=args.seed)
+
+def serve(args):
+    org = None if args.replay or args.record else build_org(args)
+    standin = GitHubStandIn(org=org, cassette=args.replay or args.record, upstream=args.upstream if args.record else None,
+                            latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                            rate_window=args.rate_window, concurrency_limit=args.concurrency_limit, port=args.port)
+    with standin:
+        if org is not None:
+            print(f"Organització sintètica: {json.dumps(org.size())}")
+        for name, value in standin.environment().items():
+            print(f"export {name}={value}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+def run(args):
+    org = None if args.replay else build_org(args)
+    if org is not None:
+        print(f"Organització sintètica: {json.dumps(org.size())}")
+    # Una execució "warm" fa consultes que no hi ha al cassette si no s'han gravat també
+    runs = args.runs.split(",") if args.runs else (["cold"] if args.replay else list(RUNS))
+    benchmark = Benchmark(org=org, cassette=args.replay, owner=args.owner, repo=args.repo, scope=args.scope,
+                          modes=args.modes.split(","), runs=runs, latency=args.latency,
+                          jitter=args.jitter, rate_limit=args.rate_limit, rate_window=args.rate_window,
+                          concurrency_limit=args.concurrency_limit, strategies=args.strategies.split(","))
+    results = benchmark.run()
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Servidor de proves que fa de GitHub")
+    add_org_arguments(serve_parser)
+    add_server_arguments(serve_parser)
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--record", metavar="CASSETTE", help="Grava les respostes de --upstream en aquest fitxer")
+    serve_parser.add_argument("--upstream", default="https://api.github.com")
+
+    run_parser = commands.add_parser("run", help="Mesura get_metrics per a cada mode de paral·lelisme")
+    add_org_arguments(run_parser)
+    add_server_arguments(run_parser)
+    run_parser.add_argument("--owner", help="Organització del cassette (per defecte, la sintètica)")
+    run_parser.add_argument("--repo", help="Repositori de GITHUB_REPOSITORY (per defecte, el primer)")
+    run_parser.add_argument("--scope", choices=("org", "repo"), default="org")
+    run_parser.add_argument("--modes", default=",".join(MODES), help="Modes de PARALLELISM separats per comes")
+    run_parser.add_argument("--strategies", default="nodes", help=f"Valors de FETCH_STRATEGY separats per comes: {', '.join(STRATEGIES)}")
+    run_parser.add_argument("--runs", help="Execucions per mode separades per comes: cold, warm (amb --replay, només cold)")
+    run_parser.add_argument("--json", help="Desa els resultats en aquest fitxer")
+
+    commands.add_parser("measure", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+    elif args.command == "run":
+        if args.replay and not (args.owner and args.repo):
+            parser.error("--replay necessita --owner i --repo")
+        run(args)
+    else:
+        measure()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# Proves de metrics.py contra el servidor de proves (GitHubStandIn). Des de docs/scripts:
+#   python -m pytest benchmark/tests
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from benchmark import GitHubStandIn
+
+VARIABLES = ("GITHUB_", "ORG_TOKEN", "PARALLELISM", "FETCH_STRATEGY", "COMMITS_", "METRICS_", "HISTORIC_LEGACY")
+
+class Checkout:
+    # Un directori docs/ com el del repositori del dashboard: config.json, metrics.json i la
+    # base de dades (.cache) de cada execució de metrics.py
+    def __init__(self, path, server, config):
+        self.path = path
+        self.server = server
+        self.scripts = os.path.join(path, "docs", "scripts")
+        os.makedirs(self.scripts)
+        with open(os.path.join(path, "docs", "config.json"), "w") as f:
+            json.dump(config, f)
+
+    def run(self, *args, event=None, **env):
+        # Cap variable de l'entorn de qui executa les proves (PARALLELISM, FETCH_STRATEGY...) hi arriba
+        environment = {name: value for name, value in os.environ.items() if not name.startswith(VARIABLES)}
+        environment.update(self.server.environment(), GITHUB_TOKEN="token", ORG_TOKEN="token",
+                           GITHUB_REPOSITORY=f"{self.server.org.name}/repo0", PYTHONPATH=SCRIPTS_DIR, **env)
+        if event is not None:
+            name, repo_name = event
+            event_path = os.path.join(self.path, "event.json")
+            with open(event_path, "w") as f:
+                json.dump({"repository": {"name": repo_name}}, f)
+            environment.update(GITHUB_EVENT_NAME=name, GITHUB_EVENT_PATH=event_path)
+            args = ("event", *args)
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "metrics.py"), *args], cwd=self.scripts,
+                                env=environment, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr[-4000:]
+        return self.metrics()
+
+    def metrics(self):
+        with open(os.path.join(self.path, "docs", "metrics.json"), "r") as f:
+            return json.load(f)
+
+@pytest.fixture
+def standin():
+    servers = []
+
+    def start(org, server_class=GitHubStandIn):
+        server = server_class(org=org).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+@pytest.fixture
+def checkout(tmp_path):
+    count = [0]
+
+    def create(server, scope="org", **config):
+        count[0] += 1
+        return Checkout(str(tmp_path / f"checkout{count[0]}"), server, {
+            "metrics_scope": scope,
+            "members": scope,
+            "excluded_members": [],
+            "excluded_repos": [],
+            **config
+        })
+
+    return create
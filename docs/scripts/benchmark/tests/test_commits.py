@@ -0,0 +1,73 @@
+from datetime import timedelta
+import pytest
+from benchmark import GitHubStandIn, SyntheticOrg
+from benchmark.SyntheticOrg import timestamp
+
+COMMIT_METRICS = ("commits", "modified_lines", "commit_merges")
+
+def merge_side_line(org, repo):
+    # Una línia de 150 commits antics (una PR d'un fork, una branca que no s'ha vist mai) fusionada a main
+    main = repo.branches["main"]
+    parent = repo.history(main)[-10]
+    for i in range(150):
+        parent = org.commit(repo, f"side-{i}", timestamp(org.start + timedelta(days=4), i * 60), parents=[parent])
+    repo.branches["main"] = org.commit(repo, "merge-side", timestamp(org.start + timedelta(days=org.days), 0), parents=[main, parent])
+
+def force_push(org, repo):
+    # feature-1 es reescriu a sobre d'un commit més antic de main: els seus commits d'abans ja no hi són
+    parent = repo.history(repo.branches["main"])[-3]
+    for i in range(20):
+        parent = org.commit(repo, f"rewrite-{i}", timestamp(org.start + timedelta(days=org.days), i * 60), parents=[parent])
+    repo.branches["feature-1"] = parent
+
+def delete_branch(org, repo):
+    del repo.branches["feature-2"]
+
+class BatchTimeouts(GitHubStandIn):
+    # Les rondes per lots a partir de la segona pàgina de commits responen com un timeout de GitHub
+    def graphql(self, query):
+        if "r0: repository" in query and "history(first: 100, after:" in query:
+            return 200, {}, {"data": None, "errors": [{"message": "Something went wrong while executing your query."}]}
+        return super().graphql(query)
+
+def build_org():
+    return SyntheticOrg("bench-org", repos=2, members=4, branches=3, commits=330, issues=5, pull_requests=5, seed=3)
+
+@pytest.mark.parametrize("mode", ["threads", "async", "false"])
+@pytest.mark.parametrize("change", [merge_side_line, force_push, delete_branch])
+def test_incremental_commits_match_fresh_run(standin, checkout, change, mode):
+    org = build_org()
+    server = standin(org)
+    incremental = checkout(server)
+    before = incremental.run(PARALLELISM=mode)
+    change(org, org.repos["repo0"])
+    after = incremental.run(PARALLELISM=mode)
+    fresh = checkout(server).run(PARALLELISM=mode)
+    assert after["commits"] != before["commits"]
+    assert {key: after[key] for key in COMMIT_METRICS} == {key: fresh[key] for key in COMMIT_METRICS}
+
+def test_incremental_commits_after_every_change(standin, checkout):
+    org = build_org()
+    server = standin(org)
+    incremental = checkout(server)
+    incremental.run()
+    for change in (merge_side_line, force_push, delete_branch):
+        change(org, org.repos["repo0"])
+        after = incremental.run()
+        fresh = checkout(server).run()
+        assert {key: after[key] for key in COMMIT_METRICS} == {key: fresh[key] for key in COMMIT_METRICS}, change.__name__
+
+def test_full_sync_ignores_cache(standin, checkout):
+    org = build_org()
+    server = standin(org)
+    incremental = checkout(server)
+    incremental.run()
+    force_push(org, org.repos["repo0"])
+    full = incremental.run(COMMITS_FULL_SYNC="1")
+    assert {key: full[key] for key in COMMIT_METRICS} == {key: checkout(server).run()[key] for key in COMMIT_METRICS}
+
+def test_batch_timeout_keeps_history_complete(standin, checkout):
+    org = build_org()
+    flaky = checkout(standin(org, BatchTimeouts)).run()
+    fresh = checkout(standin(org)).run()
+    assert {key: flaky[key] for key in COMMIT_METRICS} == {key: fresh[key] for key in COMMIT_METRICS}
@@ -0,0 +1,105 @@
+import pytest
+from benchmark import SyntheticOrg
+
+def build_org(members=4, **sizes):
+    return SyntheticOrg("bench-org", **{"repos": 3, "members": members, "branches": 2, "commits": 40,
+                                        "issues": 30, "pull_requests": 20, "seed": 3, **sizes})
+
+def add_issues(repo, count, assignees=(), state="OPEN", prefix="I_extra"):
+    start = len(repo.issues)
+    for i in range(count):
+        closed = "2024-06-02T00:00:00Z" if state == "CLOSED" else None
+        repo.issues.append((f"{prefix}_{repo.name}_{start + i}", state, "2024-06-01T00:00:00Z", closed, tuple(assignees), None))
+
+def add_multi_assignee_issues(org):
+    # Issues sense assignats, amb dos membres, només amb algú de fora i amb algú de fora i un membre
+    members = org.members
+    repo = org.repos["repo1"]
+    add_issues(repo, 5)
+    add_issues(repo, 5, (members[0], members[1]), state="CLOSED")
+    add_issues(repo, 3, ("outsider",))
+    add_issues(repo, 2, ("outsider", members[2]))
+
+def expected_issues(org, first_only):
+    # Recomptes de les issues generades: l'estratègia "nodes" només té en compte el primer
+    # assignat, la cerca de "counts" els té en compte tots
+    issues = [issue for repo in org.repos.values() for issue in repo.issues]
+
+    def assignees(issue):
+        return issue[4][:1] if first_only else issue[4]
+
+    return {
+        "assigned": {member: sum(1 for issue in issues if member in assignees(issue)) for member in org.members},
+        "closed": {member: sum(1 for issue in issues if issue[1] == "CLOSED" and member in assignees(issue)) for member in org.members},
+        "non_assigned": sum(1 for issue in issues if not set(assignees(issue)) & set(org.members)),
+        "total": len(issues),
+        "total_closed": sum(1 for issue in issues if issue[1] == "CLOSED")
+    }
+
+def issue_counts(metrics):
+    issues = metrics["issues"]
+    assigned = dict(issues["assigned"])
+    return {
+        "assigned": assigned,
+        "closed": issues["closed"],
+        "non_assigned": assigned.pop("non_assigned"),
+        "total": issues["total"],
+        "total_closed": issues["total_closed"]
+    }
+
+def test_strategies_match_with_single_assignees(standin, checkout):
+    server = standin(build_org())
+    nodes = checkout(server).run(FETCH_STRATEGY="nodes")
+    counts = checkout(server).run(FETCH_STRATEGY="counts")
+    assert nodes == counts
+
+# Amb 4 membres la cerca que exclou tots els membres cap en una consulta; amb 16 no, i les issues
+# assignades es recorren repositori per repositori
+@pytest.mark.parametrize("members", [4, 16])
+@pytest.mark.parametrize("excluded_repos", [[], ["repo2"]], ids=["all-repos", "excluded-repo"])
+def test_strategies_with_multi_assignee_issues(standin, checkout, members, excluded_repos):
+    org = build_org(members)
+    add_multi_assignee_issues(org)
+    server = standin(org)
+    nodes = checkout(server, excluded_repos=excluded_repos).run(FETCH_STRATEGY="nodes")
+    counts = checkout(server, excluded_repos=excluded_repos).run(FETCH_STRATEGY="counts")
+    for repo_name in excluded_repos:
+        del org.repos[repo_name]
+    assert issue_counts(nodes) == expected_issues(org, first_only=True)
+    assert issue_counts(counts) == expected_issues(org, first_only=False)
+    # Les mètriques que no depenen dels assignats són les mateixes amb les dues estratègies
+    assert {key: value for key, value in nodes.items() if key != "issues"} == {key: value for key, value in counts.items() if key != "issues"}
+
+@pytest.mark.parametrize("strategy", ["nodes", "counts"])
+def test_org_event_refreshes_every_repo(standin, checkout, strategy):
+    org = build_org()
+    server = standin(org)
+    dashboard = checkout(server)
+    before = dashboard.run(FETCH_STRATEGY=strategy)
+    # Els esdeveniments són tots del repositori del dashboard; l'activitat és en un altre
+    add_issues(org.repos["repo1"], 30)
+    after = dashboard.run(FETCH_STRATEGY=strategy, event=("issues", "repo0"))
+    assert after["issues"]["total"] == before["issues"]["total"] + 30
+    assert after == checkout(server).run(FETCH_STRATEGY=strategy)
+
+@pytest.mark.parametrize("strategy", ["nodes", "counts"])
+def test_repo_event_refreshes_the_repo(standin, checkout, strategy):
+    org = build_org()
+    server = standin(org)
+    dashboard = checkout(server, scope="repo")
+    before = dashboard.run(FETCH_STRATEGY=strategy)
+    add_issues(org.repos["repo0"], 3)
+    after = dashboard.run(FETCH_STRATEGY=strategy, event=("issues", "repo0"))
+    assert after["issues"]["total"] == before["issues"]["total"] + 3
+    assert after == checkout(server, scope="repo").run(FETCH_STRATEGY=strategy)
+
+@pytest.mark.parametrize("scope", ["org", "repo"])
+@pytest.mark.parametrize("strategy", ["nodes", "counts"])
+def test_parallelism_modes_give_the_same_output(standin, checkout, scope, strategy):
+    org = build_org(branches=3)
+    add_multi_assignee_issues(org)
+    server = standin(org)
+    outputs = {mode: checkout(server, scope=scope).run(PARALLELISM=mode, FETCH_STRATEGY=strategy)
+               for mode in ("threads", "async", "false")}
+    assert outputs["async"] == outputs["threads"]
+    assert outputs["false"] == outputs["threads"]
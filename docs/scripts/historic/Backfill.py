@@ -0,0 +1,151 @@
+import copy
+from datetime import date, timedelta
+from metricsCollectors.StreakIndex import StreakIndex
+from metricsCollectors.collectProject import CollectProject
+
+# Registres sense data (p. ex. desats abans que els fetchers en guardessin) compten des del principi
+ALWAYS = 0
+
+def ordinal(day):
+    return date.fromisoformat(day).toordinal() if day else ALWAYS
+
+class Backfill:
+    # Reconstrueix les mètriques de cada dia d'un rang amb una sola passada pels esdeveniments
+    # ordenats per data (commits, issues creades i tancades, PRs creades, fusionades i tancades).
+    # Els comptadors reprodueixen els col·lectors: el dia D dona el mateix que si s'haguessin
+    # executat amb les dades que existien aquell dia. Els assignats, els estats i el projecte
+    # no tenen historial a l'API, així que se'n fa servir el valor actual
+    def __init__(self, data: dict, members):
+        self.data = data
+        self.members = members
+        self.streaks = StreakIndex()
+        self.commits = {member: 0 for member in members}
+        self.modified_lines = {member: {"additions": 0, "deletions": 0, "modified": 0} for member in members}
+        self.commit_totals = {"anonymous": 0, "total": 0, "merges": 0, "additions": 0, "deletions": 0, "modified": 0}
+        self.issues_assigned = {member: 0 for member in members}
+        self.issues_closed = {member: 0 for member in members}
+        self.issue_totals = {"non_assigned": 0, "have_pull_request": 0, "assignee_is_pr_author": 0, "total_closed": 0, "total": 0}
+        self.prs_created = {member: 0 for member in members}
+        self.prs_merged = {member: 0 for member in members}
+        self.pr_totals = {"merged": 0, "not_merged_by_author": 0, "closed": 0, "total": 0}
+        self.project = CollectProject().execute(data, {}, members)["project"] if "project" in data else None
+
+    def events(self):
+        members = set(self.members)
+        events = []
+        for commit in self.data.get("commits", {}).values():
+            if commit["merge"]:
+                events.append((ordinal(commit["date"]), self.commit_merge, commit))
+            elif commit["author"] in members:
+                events.append((ordinal(commit["date"]), self.member_commit, commit))
+            elif commit["author"] != "github-actions[bot]":
+                events.append((ordinal(commit["date"]), self.anonymous_commit, commit))
+        for issue in self.data.get("issues", {}).values():
+            created = ordinal(issue["created_at"])
+            events.append((created, self.issue_created, issue))
+            if issue["state"] == "CLOSED":
+                events.append((max(created, ordinal(issue["closed_at"])), self.issue_closed, issue))
+        for pull_request in self.data.get("pull_requests", {}).values():
+            created = ordinal(pull_request["created_at"])
+            events.append((created, self.pull_request_created, pull_request))
+            if pull_request["merged"] != False:
+                events.append((max(created, ordinal(pull_request["merged_at"])), self.pull_request_merged, pull_request))
+            elif pull_request["state"] == "CLOSED":
+                events.append((max(created, ordinal(pull_request["closed_at"])), self.pull_request_closed, pull_request))
+        events.sort(key=lambda event: event[0])
+        return events
+
+    def commit_merge(self, day, commit):
+        self.commit_totals["merges"] += 1
+
+    def member_commit(self, day, commit):
+        author = commit["author"]
+        self.commits[author] += 1
+        for column in ("additions", "deletions", "modified"):
+            self.modified_lines[author][column] += commit[column]
+            self.commit_totals[column] += commit[column]
+        self.commit_totals["total"] += 1
+        self.streaks.add(author, day)
+
+    def anonymous_commit(self, day, commit):
+        self.commit_totals["anonymous"] += 1
+        self.commit_totals["total"] += 1
+
+    def issue_created(self, day, issue):
+        self.issue_totals["total"] += 1
+        if issue["assignee"] != None and issue["assignee"] in self.issues_assigned:
+            self.issues_assigned[issue["assignee"]] += 1
+        else:
+            self.issue_totals["non_assigned"] += 1
+
+    def issue_closed(self, day, issue):
+        self.issue_totals["total_closed"] += 1
+        if issue["assignee"] != None and issue["assignee"] in self.issues_closed:
+            self.issues_closed[issue["assignee"]] += 1
+            if issue["has_pull_request"] == True:
+                self.issue_totals["have_pull_request"] += 1
+                if issue["pr_author_is_assignee"] == True:
+                    self.issue_totals["assignee_is_pr_author"] += 1
+
+    def pull_request_created(self, day, pull_request):
+        self.pr_totals["total"] += 1
+        self.prs_created[pull_request["author"]] += 1
+
+    def pull_request_merged(self, day, pull_request):
+        self.pr_totals["merged"] += 1
+        self.prs_merged[pull_request["merged_by"]] += 1
+        if pull_request["author"] != pull_request["merged_by"]:
+            self.pr_totals["not_merged_by_author"] += 1
+
+    def pull_request_closed(self, day, pull_request):
+        self.pr_totals["closed"] += 1
+
+    def snapshot(self, day):
+        # Mateixes claus i mateix ordre que els col·lectors (sense avatars, com a l'històric)
+        metrics = {}
+        if "commits" in self.data:
+            metrics["commits"] = {**self.commits, "anonymous": self.commit_totals["anonymous"], "total": self.commit_totals["total"]}
+            metrics["modified_lines"] = {
+                **copy.deepcopy(self.modified_lines),
+                "total": {column: self.commit_totals[column] for column in ("additions", "deletions", "modified")}
+            }
+            # L'execució diària d'un dia D es fa l'endemà, quan la ratxa de D encara és viva
+            metrics["commit_streak"] = {member: self.streaks.current(member, day + 1) for member in self.members}
+            metrics["commit_merges"] = self.commit_totals["merges"]
+            metrics["longest_commit_streak_per_user"] = {member: self.streaks.longest_streak(member) for member in self.members}
+        if "issues" in self.data:
+            metrics["issues"] = {
+                "assigned": {**self.issues_assigned, "non_assigned": self.issue_totals["non_assigned"]},
+                "closed": dict(self.issues_closed),
+                "have_pull_request": self.issue_totals["have_pull_request"],
+                "assignee_is_pr_author": self.issue_totals["assignee_is_pr_author"],
+                "total_closed": self.issue_totals["total_closed"],
+                "total": self.issue_totals["total"]
+            }
+        if "pull_requests" in self.data:
+            metrics["pull_requests"] = {
+                "created": dict(self.prs_created),
+                "merged_per_member": dict(self.prs_merged),
+                "merged": self.pr_totals["merged"],
+                "not_merged_by_author": self.pr_totals["not_merged_by_author"],
+                "closed": self.pr_totals["closed"],
+                "total": self.pr_totals["total"]
+            }
+        if self.project is not None:
+            metrics["project"] = copy.deepcopy(self.project)
+        return metrics
+
+    def days(self, start, end):
+        # Genera (dia, mètriques) per a cada dia de [start, end]
+        events = self.events()
+        next_event = 0
+        current = date.fromisoformat(start)
+        last = date.fromisoformat(end)
+        while current <= last:
+            day = current.toordinal()
+            while next_event < len(events) and events[next_event][0] <= day:
+                event_day, handler, record = events[next_event]
+                handler(event_day, record)
+                next_event += 1
+            yield current.isoformat(), self.snapshot(day)
+            current += timedelta(days=1)
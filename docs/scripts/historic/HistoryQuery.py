@@ -0,0 +1,52 @@
+from .HistoryStore import HistoryStore
+from .Rollups import Rollups, period, period_bounds
+
+class HistoryQuery:
+    # Consultes sobre l'històric: "mètrica X per als membres Y entre les dates A i B per dia,
+    # setmana o mes". Les setmanes i els mesos surten de les sèries precalculades si n'hi ha
+    def __init__(self, store=None):
+        self.store = store or HistoryStore()
+        self.rollups = Rollups(self.store.path)
+
+    def paths(self, metric, members):
+        # "commits" + alice -> "commits.alice"; "modified_lines.{member}.additions" per als camins on
+        # el membre no és l'última clau
+        if members is None:
+            return {metric: metric}
+        if "{member}" in metric:
+            return {member: metric.replace("{member}", member) for member in members}
+        return {member: f"{metric}.{member}" for member in members}
+
+    def query(self, metric, members=None, start=None, end=None, granularity="day") -> dict:
+        paths = self.paths(metric, members)
+        if granularity != "day" and self.rollups.exists():
+            return self.from_rollup(paths, start, end, granularity)
+        # Els períodes es consulten sencers, igual que a les sèries precalculades
+        if start is not None:
+            start = period_bounds(start, granularity)[0]
+        if end is not None:
+            end = period_bounds(end, granularity)[1]
+        series = {name: self.store.series(path, start, end) for name, path in paths.items()}
+        days = sorted({day for values in series.values() for day in values})
+        # Per setmana o mes (sense sèries precalculades) val l'últim dia del període
+        last_days = {}
+        for day in days:
+            last_days[period(day, granularity)] = day
+        periods = list(last_days)
+        return {
+            "granularity": granularity,
+            "periods": periods,
+            "series": {name: [values.get(last_days[key]) for key in periods] for name, values in series.items()}
+        }
+
+    def from_rollup(self, paths, start, end, granularity):
+        rollup = self.rollups.load(granularity)
+        selected = [
+            i for i, key in enumerate(rollup["periods"])
+            if (start is None or key >= period(start, granularity)) and (end is None or key <= period(end, granularity))
+        ]
+        return {
+            "granularity": granularity,
+            "periods": [rollup["periods"][i] for i in selected],
+            "series": {name: [(rollup["series"].get(path) or [None] * len(rollup["periods"]))[i] for i in selected] for name, path in paths.items()}
+        }
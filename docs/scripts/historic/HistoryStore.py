@@ -0,0 +1,182 @@
+import os
+import copy
+import json
+
+HISTORIC_DIR = os.path.join("..", "historic")
+MANIFEST = "manifest.json"
+
+def diff(previous, current, path=()):
+    # Canvis de `previous` a `current`: camins (llistes de claus) que canvien de valor i camins que desapareixen
+    changes = {"set": [], "unset": []}
+    for key, value in current.items():
+        if key not in previous:
+            changes["set"].append([[*path, key], value])
+        elif isinstance(value, dict) and isinstance(previous[key], dict) and value:
+            child = diff(previous[key], value, (*path, key))
+            changes["set"].extend(child["set"])
+            changes["unset"].extend(child["unset"])
+        elif value != previous[key] or type(value) is not type(previous[key]):
+            changes["set"].append([[*path, key], value])
+    for key in previous:
+        if key not in current:
+            changes["unset"].append([*path, key])
+    return changes
+
+def apply(state, delta):
+    for path in delta.get("unset", []):
+        node = state
+        for key in path[:-1]:
+            node = node[key]
+        del node[path[-1]]
+    for path, value in delta.get("set", []):
+        node = state
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return state
+
+def lookup(state, path):
+    node = state
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return None
+        node = node[key]
+    return node
+
+class HistoryStore:
+    # Històric partit per mesos: un fitxer JSON Lines per mes (una línia per dia) i un
+    # manifest petit amb el rang de dates de cada partició. La primera línia de cada mes és
+    # una còpia sencera de les mètriques (keyframe) i la resta només guarden els canvis
+    # respecte de la línia anterior. Afegir un dia només llegeix el mes en curs i hi escriu una línia
+    def __init__(self, path=HISTORIC_DIR):
+        self.path = path
+        self.manifest_path = os.path.join(path, MANIFEST)
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def manifest(self) -> dict:
+        if not self.exists():
+            return {"partitions": {}}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def partition_name(self, day):
+        return day[:7]
+
+    def partition_path(self, partition):
+        return os.path.join(self.path, f"{partition}.jsonl")
+
+    def states(self, partition):
+        # (dia, estat) per a cada línia, en l'ordre del fitxer. L'estat es reutilitza d'una
+        # línia a l'altra: qui el vulgui guardar n'ha de fer una còpia
+        path = self.partition_path(partition)
+        if not os.path.exists(path):
+            return
+        state = None
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "metrics" in record:
+                    state = record["metrics"]
+                else:
+                    state = apply(state, record["delta"])
+                yield record["date"], state
+
+    def read_partition(self, partition) -> dict:
+        # {dia: mètriques}. Si un dia s'ha escrit més d'un cop, val l'última línia
+        days = {}
+        for day, state in self.states(partition):
+            days[day] = copy.deepcopy(state)
+        return dict(sorted(days.items()))
+
+    def append(self, day, metrics) -> bool:
+        # Retorna si el dia ja hi era (i, per tant, s'ha substituït)
+        partition = self.partition_name(day)
+        existed = False
+        previous = None
+        for recorded_day, state in self.states(partition):
+            existed = existed or recorded_day == day
+            previous = state
+        if previous is None:
+            record = {"date": day, "metrics": metrics}
+        else:
+            record = {"date": day, "delta": {key: changes for key, changes in diff(previous, metrics).items() if changes}}
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.partition_path(partition), "a") as f:
+            f.write(json.dumps(record) + "\n")
+        manifest = self.manifest()
+        entry = manifest["partitions"].setdefault(partition, {"file": f"{partition}.jsonl", "first": day, "last": day, "days": 0})
+        entry["first"] = min(entry["first"], day)
+        entry["last"] = max(entry["last"], day)
+        if not existed:
+            entry["days"] += 1
+        self.write_manifest(manifest)
+        return existed
+
+    def partitions(self, start=None, end=None):
+        # Només les particions que se solapen amb el rang demanat
+        for partition, entry in sorted(self.manifest()["partitions"].items()):
+            if (start is None or entry["last"] >= start) and (end is None or entry["first"] <= end):
+                yield partition
+
+    def read(self, start=None, end=None):
+        for partition in self.partitions(start, end):
+            for day, metrics in self.read_partition(partition).items():
+                if (start is None or day >= start) and (end is None or day <= end):
+                    yield day, metrics
+
+    def snapshot(self, day):
+        # Mètriques d'un dia: només es llegeix la partició del seu mes
+        snapshot = None
+        for recorded_day, state in self.states(self.partition_name(day)):
+            if recorded_day == day:
+                snapshot = copy.deepcopy(state)
+        return snapshot
+
+    def series(self, path, start=None, end=None) -> dict:
+        # {dia: valor} d'una sola mètrica, p. ex. "commits.alice", sense copiar cap estat sencer
+        if isinstance(path, str):
+            path = path.split(".")
+        values = {}
+        for partition in self.partitions(start, end):
+            for day, state in self.states(partition):
+                if (start is None or day >= start) and (end is None or day <= end):
+                    values[day] = copy.deepcopy(lookup(state, path))
+        return dict(sorted(values.items()))
+
+    def import_history(self, historic: dict):
+        # Migració única de l'historic_metrics.json d'abans
+        for day, metrics in sorted(historic.items()):
+            self.append(day, metrics)
+
+    def write_legacy(self, legacy_path, day, metrics, existed):
+        # El dashboard encara llegeix historic_metrics.json. Un dia nou s'hi afegeix al final
+        # sense llegir ni reescriure la resta del fitxer: el text és idèntic al que escriuria
+        # json.dump(historic, indent=4) amb el dia afegit
+        entry = json.dumps({day: metrics}, indent=4)[2:-2]
+        if not existed and os.path.exists(legacy_path):
+            with open(legacy_path, "rb+") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if size > 3:
+                    f.seek(size - 2)
+                    if f.read(2) == b"\n}":
+                        f.seek(size - 2)
+                        f.write(f",\n{entry}\n}}".encode())
+                        return
+        # Dia repetit o fitxer inexistent o diferent: es torna a generar sencer des de les particions
+        self.rewrite_legacy(legacy_path)
+
+    def rewrite_legacy(self, legacy_path):
+        with open(legacy_path, "w") as f:
+            json.dump(dict(self.read()), f, indent=4)
@@ -0,0 +1,107 @@
+import os
+import json
+from datetime import date, timedelta
+
+GRANULARITIES = ("week", "month")
+ROLLUPS_DIR = "rollups"
+
+def period(day, granularity):
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        year, week, _ = date.fromisoformat(day).isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == "month":
+        return day[:7]
+    raise ValueError(f"Granularitat no vàlida: {granularity}. Valors vàlids: day, {', '.join(GRANULARITIES)}")
+
+def period_bounds(day, granularity):
+    # Primer i últim dia del període que conté `day`
+    current = date.fromisoformat(day)
+    if granularity == "week":
+        first = current - timedelta(days=current.weekday())
+        return first.isoformat(), (first + timedelta(days=6)).isoformat()
+    if granularity == "month":
+        first = current.replace(day=1)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return first.isoformat(), last.isoformat()
+    return day, day
+
+def flatten(metrics, prefix=""):
+    # {"commits.alice": 3, ...}: només els valors numèrics, que són els que es poden representar
+    values = {}
+    for key, value in metrics.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = value
+    return values
+
+class Rollups:
+    # Sèries setmanals i mensuals precalculades: per a cada període, el valor de cada mètrica
+    # l'últim dia registrat del període. El dashboard en té prou amb un fitxer petit per granularitat
+    def __init__(self, path):
+        self.path = os.path.join(path, ROLLUPS_DIR)
+
+    def file_path(self, granularity):
+        return os.path.join(self.path, f"{granularity}.json")
+
+    def exists(self):
+        return all(os.path.exists(self.file_path(granularity)) for granularity in GRANULARITIES)
+
+    def load(self, granularity) -> dict:
+        path = self.file_path(granularity)
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, ValueError):
+                pass
+        return {"granularity": granularity, "aggregate": "last", "periods": [], "days": [], "series": {}}
+
+    def write(self, granularity, rollup):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self.file_path(granularity)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(rollup, f)
+        os.replace(tmp_path, self.file_path(granularity))
+
+    def add(self, rollup, day, values):
+        key = period(day, rollup["granularity"])
+        periods = rollup["periods"]
+        if key in periods:
+            i = periods.index(key)
+            # Un dia anterior (p. ex. recuperat més tard) no substitueix el valor de final de període
+            if rollup["days"][i] > day:
+                return
+            rollup["days"][i] = day
+        else:
+            i = len(periods)
+            while i > 0 and periods[i - 1] > key:
+                i -= 1
+            periods.insert(i, key)
+            rollup["days"].insert(i, day)
+            for series in rollup["series"].values():
+                series.insert(i, None)
+        for path, value in values.items():
+            rollup["series"].setdefault(path, [None] * len(periods))[i] = value
+        for path, series in rollup["series"].items():
+            if path not in values:
+                series[i] = None
+
+    def update(self, day, metrics):
+        values = flatten(metrics)
+        for granularity in GRANULARITIES:
+            rollup = self.load(granularity)
+            self.add(rollup, day, values)
+            self.write(granularity, rollup)
+
+    def rebuild(self, history):
+        rollups = {granularity: self.load(granularity) for granularity in GRANULARITIES}
+        for day, metrics in history.read():
+            values = flatten(metrics)
+            for rollup in rollups.values():
+                self.add(rollup, day, values)
+        for granularity, rollup in rollups.items():
+            self.write(granularity, rollup)
@@ -0,0 +1,4 @@
+from .HistoryStore import HistoryStore
+from .HistoryQuery import HistoryQuery
+from .Rollups import Rollups
+from .Backfill import Backfill
@@ -1,11 +1,23 @@
 import os
 import sys
 import json
+import asyncio
+import argparse
+import contextlib
+from collections.abc import Mapping
 from datetime import datetime,timezone,timedelta
 import api
 import metricsCollectors
 import concurrent.futures
-from api import GetCollaborators,GetMembers,GetOrgRepos
+from api.BatchQuery import BatchQuery
+from api.RequestScheduler import scheduler, MAX_CONCURRENCY
+from api.RecordTable import TABLES
+from api.GetCommits import BRANCH_WORKERS
+from api.DataStore import default_store, GLOBAL
+from metricsCollectors.ParallelCollectors import ParallelCollectors
+from historic import HistoryStore, Rollups, Backfill
+from output import MetricsWriter
+from tracing import tracer, Profiler
 
 def load_env_local(path):
     with open(path, 'r') as f:
@@ -20,7 +32,35 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN").strip()
 ORG_TOKEN = os.getenv("ORG_TOKEN").strip()
 REPO = os.getenv("GITHUB_REPOSITORY")
 REPO_OWNER,REPO_NAME = os.getenv("GITHUB_REPOSITORY").split("/")
-PARALLELISM = True
+# PARALLELISM: "threads" (per defecte), "async" o "false" per fer-ho tot seqüencialment
+PARALLELISM_MODE = (os.getenv("PARALLELISM") or "threads").strip().lower()
+PARALLELISM = PARALLELISM_MODE not in ["false","0","no","sequential"]
+ASYNC_MODE = PARALLELISM_MODE == "async"
+# HISTORIC_LEGACY=false deixa d'escriure historic_metrics.json (només les particions de ../historic)
+HISTORIC_LEGACY = (os.getenv("HISTORIC_LEGACY") or "true").strip().lower() not in ["false","0","no"]
+# METRICS_FORMAT: "pretty" (per defecte, indentat) o "compact"; METRICS_COMPRESS: "gzip", "brotli" o tots dos separats per comes
+METRICS_FORMAT = (os.getenv("METRICS_FORMAT") or "pretty").strip().lower()
+METRICS_COMPRESS = [method.strip().lower() for method in (os.getenv("METRICS_COMPRESS") or "").split(",") if method.strip()]
+# METRICS_PROFILE: "cprofile" o "sampling" per perfilar l'etapa de col·lectors (per defecte, cap)
+METRICS_PROFILE = (os.getenv("METRICS_PROFILE") or "").strip().lower()
+# FETCH_STRATEGY: "nodes" (per defecte) baixa totes les issues i PRs; "counts" en demana els
+# recomptes a GitHub (totalCount i cerques per membre) i només baixa els nodes imprescindibles
+FETCH_STRATEGY = (os.getenv("FETCH_STRATEGY") or "nodes").strip().lower()
+# COMMITS_SOURCE: "api" (per defecte) recorre l'historial de cada branca amb GraphQL; "git" en
+# manté un mirall local (.cache/mirrors) i en llegeix els commits amb git log
+COMMITS_SOURCE = (os.getenv("COMMITS_SOURCE") or "api").strip().lower()
+REPORT_PATH = "../metrics_report.json"
+PROFILE_PATHS = {"cprofile": "../metrics_profile.prof", "sampling": "../metrics_profile.txt"}
+REPO_WORKERS = 4
+FETCHER_WORKERS = 4
+# Dades que cal tornar a demanar per a cada tipus d'esdeveniment del workflow
+EVENT_SCOPES = {
+    "issues": {"issues", "issue_counts", "member_counts"},
+    "pull_request": {"pull_requests", "issues", "pull_request_counts", "issue_counts", "member_counts"},
+    "push": {"commits"}
+}
+# Un sol pool de connexions per a tots els fils de totes les crides
+scheduler.resize(min(REPO_WORKERS * FETCHER_WORKERS * BRANCH_WORKERS, MAX_CONCURRENCY))
 HEADERS_REPO = {
     "Authorization": f"token {GITHUB_TOKEN}",
     "Content-Type": "application/json"
@@ -29,6 +69,9 @@ HEADERS_ORG = {
     "Authorization": f"token {ORG_TOKEN}",
     "Content-Type": "application/json"
     }
+# La memòria cau HTTP identifica cada credencial pel nom del secret
+scheduler.response_cache.identify(HEADERS_REPO, "GITHUB_TOKEN")
+scheduler.response_cache.identify(HEADERS_ORG, "ORG_TOKEN")
 required_fields = {
     "metrics_scope": str,
     "members": str,
@@ -38,6 +81,12 @@ required_fields = {
 
 valid_metrics_scope = ["org","repo"]
 valid_members = ["org","repo","both"]
+# Funcionalitats opcionals (les mateixes que fa servir el dashboard); els commits i els membres sempre hi són
+valid_features = ["issues","pull-requests","projects"]
+# Sense el camp "features", les que mostra el dashboard per defecte
+default_features = ["issues","pull-requests"]
+valid_strategies = ["nodes","counts"]
+valid_commit_sources = ["api","git"]
 
 class ConfigError(Exception):
     pass
@@ -53,98 +102,286 @@ def validar_config(config):
         raise ConfigError(f"Error: El camp obligatori 'metrics_scope' de config.json no té un valor vàlid. Valors vàlids: {valid_metrics_scope}")
     if config["members"] not in valid_members:
         raise ConfigError(f"Error: El camp obligatori 'members' de config.json no té un valor vàlid. Valors vàlids: {valid_members}")
+    if "features" in config:
+        if not isinstance(config["features"],list):
+            raise ConfigError("Error: El camp 'features' de config.json ha de ser de tipus list")
+        for feature in config["features"]:
+            if feature not in valid_features:
+                raise ConfigError(f"Error: El camp 'features' de config.json té un valor no vàlid: '{feature}'. Valors vàlids: {valid_features}")
+
+def enabled_features(config):
+    return config.get("features", default_features)
+
+def required_data(config,strategy=FETCH_STRATEGY):
+    # Claus de `data` que llegeixen els col·lectors actius: només es demanen aquestes a l'API
+    return {key for collector in metricsCollectors.collectors(enabled_features(config),strategy=strategy) for key in collector.reads}
+
+def check_stored(config,store,strategy=FETCH_STRATEGY):
+    # Sense trucades a l'API, la base de dades ha de tenir les dades de l'estratègia que es fa servir
+    missing = required_data(config,strategy) - store.keys()
+    if missing:
+        raise ConfigError(f"Error: La base de dades no té les dades {sorted(missing)}: cal una execució completa amb FETCH_STRATEGY={strategy}")
     
-def make_api_calls(repo,instances,project_number,headers):
-    local_data = {}
-    if not PARALLELISM:
-        for instance in instances:
-            local_data = instance.execute(REPO_OWNER,repo,headers,project_number,local_data)
-    else:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(instance.execute, REPO_OWNER, repo, headers, project_number, local_data) for instance in instances]
-
-            for future in concurrent.futures.as_completed(futures):
-                local_data = future.result()
-    return local_data
-
-def combinar_resultats(result,data): 
-    for key, value in result.items():
-        if key in data and isinstance(data[key], dict) and isinstance(value, dict):
-            data[key].update(value)
-        elif key in data and isinstance(data[key], list) and isinstance(value, list):
-            data[key].extend(value)
+def make_api_calls(repo,instances,project_number,headers,prefetched=None):
+    # Cada fetcher retorna el seu propi resultat parcial, en l'ordre de les instàncies
+    context = prefetched or {}
+    partials = [prefetched] if prefetched else []
+    # Les dades que ja s'han obtingut per lots no es tornen a demanar
+    instances = [instance for instance in instances if instance.provides not in context]
+    with tracer.span("repo", repo=repo):
+        if not PARALLELISM:
+            for instance in instances:
+                partials.append(instance.execute(REPO_OWNER,repo,headers,project_number,context))
         else:
-            data[key] = value  
-    return data
+            with concurrent.futures.ThreadPoolExecutor(max_workers=FETCHER_WORKERS) as executor:
+                futures = [executor.submit(tracer.bind(instance.execute), REPO_OWNER, repo, headers, project_number, context) for instance in instances]
+                partials.extend(future.result() for future in futures)
+    return partials
 
-def get_metrics():
-    config_path = "../config.json"
-    if os.path.exists(config_path):
-        with open(config_path,'r') as f:
-            config = json.load(f)
-    else:
-        raise FileNotFoundError("Arxiu config.json no trobat.")
-    validar_config(config)
-    metrics_path = "../metrics.json"
-    if os.path.exists(metrics_path):
-        try:
-            with open(metrics_path, "r") as j:
-                metrics = json.load(j)
-        except (json.JSONDecodeError, ValueError):
-            metrics = {}
-    else:
-        metrics = {}
+async def make_api_calls_async(repos,instances,project_number,headers,prefetched):
+    # Tots els paginadors de tots els repositoris comparteixen el mateix bucle i el límit global del scheduler
+    async def repo_calls(repo):
+        context = prefetched.get(repo) or {}
+        pending = [instance for instance in instances if instance.provides not in context]
+        with tracer.span("repo", repo=repo):
+            results = await asyncio.gather(*(instance.execute_async(REPO_OWNER,repo,headers,project_number,context) for instance in pending))
+        return ([context] if context else []) + list(results)
+    return await asyncio.gather(*(repo_calls(repo) for repo in repos))
+
+def combinar_resultats(results):
+    # Fusiona els resultats parcials en l'ordre donat sense modificar-los
     data = {}
+    for result in results:
+        for key, value in result.items():
+            if key not in data:
+                if isinstance(value, Mapping):
+                    data[key] = value.copy()
+                elif isinstance(value, list):
+                    data[key] = list(value)
+                else:
+                    data[key] = value
+            elif isinstance(data[key], Mapping) and isinstance(value, Mapping):
+                data[key].update(value)
+            elif isinstance(data[key], list) and isinstance(value, list):
+                data[key].extend(value)
+            else:
+                data[key] = value
+    return data
+
+def event_scope():
+    # Repositori i claus de `data` afectades per l'esdeveniment que ha disparat el workflow
+    event_name = os.getenv("GITHUB_EVENT_NAME")
+    event_path = os.getenv("GITHUB_EVENT_PATH")
+    if event_name not in EVENT_SCOPES or not event_path or not os.path.exists(event_path):
+        return None
+    with open(event_path, "r") as f:
+        payload = json.load(f)
+    repo = (payload.get("repository") or {}).get("name")
+    if repo is None:
+        return None
+    return repo, EVENT_SCOPES[event_name]
+
+def build_instances(config,strategy=FETCH_STRATEGY):
     instances = []
-    project_number = -1
     if config['metrics_scope'] == "org":
-        instancesConfig = []
-        instancesConfig.append(GetOrgRepos())
-        instancesConfig.append(GetMembers())
-        data = GetOrgRepos().execute(REPO_OWNER,"",HEADERS_ORG,"",data)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(instance.execute,REPO_OWNER,"",HEADERS_ORG,"",data) for instance in instancesConfig]
-            for future in concurrent.futures.as_completed(futures):
-                data.update(future.result())  
-        if(config["members"] == "both"): instances.append(GetCollaborators())
-        repos = [m for m in data['repos'] if m not in config['excluded_repos']]
+        if(config["members"] == "both"): instances.append(api.load("GetCollaborators")(scheduler=scheduler))
         HEADERS = HEADERS_ORG
     else:
         if config["members"] == "repo": 
-            instances.append(GetCollaborators())
+            instances.append(api.load("GetCollaborators")(scheduler=scheduler))
             HEADERS = HEADERS_REPO
         elif config["members"] == "org": 
-            instances.append(GetMembers())
+            instances.append(api.load("GetMembers")(scheduler=scheduler))
             HEADERS = HEADERS_ORG
         elif config["members"] == "both":
-            instances.append(GetMembers())
-            instances.append(GetCollaborators())
+            instances.append(api.load("GetMembers")(scheduler=scheduler))
+            instances.append(api.load("GetCollaborators")(scheduler=scheduler))
             HEADERS = HEADERS_ORG
-        repos = [REPO_NAME]
 
-    for class_name, class_obj in api.__dict__.items():
-        if isinstance(class_obj, type) and class_name.startswith("Get") and class_name not in ["GetMembers","GetCollaborators","GetOrgRepos"]:
-            instances.append(class_obj(PARALLELISM))
+    # Les funcionalitats desactivades no fan cap trucada: ni tan sols se n'importa el fetcher
+    for fetcher in api.repo_fetchers(required_data(config,strategy),{"commits": COMMITS_SOURCE}):
+        instances.append(fetcher(PARALLELISM, scheduler))
+    return instances, HEADERS
+
+def fetch_repos(repos,instances,headers,prefetched):
+    project_number = -1
+    if ASYNC_MODE:
+        results = asyncio.run(make_api_calls_async(repos,instances,project_number,headers,prefetched))
+        return dict(zip(repos, results))
+    repo_partials = {}
     if not PARALLELISM:
         for repo in repos:
-            result = make_api_calls(repo,instances,project_number,HEADERS) 
-            combinar_resultats(result,data)    
+            repo_partials[repo] = make_api_calls(repo,instances,project_number,headers,prefetched.get(repo))
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=REPO_WORKERS) as executor:
+            futures = [executor.submit(tracer.bind(make_api_calls), repo, instances,project_number, headers, prefetched.get(repo)) for repo in repos]
+            for repo, future in zip(repos, futures):
+                repo_partials[repo] = future.result()
+    return repo_partials
+
+def fetch_all(config,instances,headers,store,strategy=FETCH_STRATEGY):
+    global_partials = []
+    if config['metrics_scope'] == "org":
+        instancesConfig = []
+        instancesConfig.append(api.load("GetOrgRepos")(scheduler=scheduler))
+        instancesConfig.append(api.load("GetMembers")(scheduler=scheduler))
+        with tracer.span("discover"), concurrent.futures.ThreadPoolExecutor(max_workers=FETCHER_WORKERS) as executor:
+            futures = [executor.submit(tracer.bind(instance.execute),REPO_OWNER,"",HEADERS_ORG,"",{}) for instance in instancesConfig]
+            global_partials.extend(future.result() for future in futures)
+        repos = [m for m in combinar_resultats(global_partials)['repos'] if m not in config['excluded_repos']]
+        with tracer.span("batch_query", repos=len(repos)):
+            # Amb COMMITS_SOURCE=git, els commits no es demanen a l'API
+            batched = required_data(config,strategy) - ({"commits"} if COMMITS_SOURCE == "git" else set())
+            prefetched = BatchQuery(scheduler=scheduler).execute(REPO_OWNER,repos,headers,batched)
     else:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(make_api_calls, repo, instances,project_number, HEADERS) for repo in repos]
+        repos = [REPO_NAME]
+        prefetched = {}
+    repo_partials = fetch_repos(repos,instances,headers,prefetched)
+    members = combinar_resultats(global_partials + [partial for partials in repo_partials.values() for partial in partials]).get('members',[])
+    global_partials.extend(fetch_globals(config,required_data(config,strategy),headers,members,repos))
+    store.replace_all(global_partials,repo_partials)
+    # Una execució completa demana totes les respostes que encara calen
+    scheduler.response_cache.prune()
+
+def fetch_globals(config,keys,headers,members,repos):
+    # Els recomptes per membre es fan un sol cop per a tots els repositoris, quan ja es coneixen els membres
+    fetchers = api.global_fetchers(keys)
+    if not fetchers:
+        return []
+    repos = [repo for repo in repos if repo not in config['excluded_repos']]
+    # Sense repositoris exclosos, les cerques poden fer servir org: en lloc de repo:
+    whole_org = config['metrics_scope'] == "org" and not config['excluded_repos']
+    context = {"members": [m for m in members if m not in config['excluded_members']], "repos": repos, "whole_org": whole_org}
+    with tracer.span("globals"):
+        return [fetcher(scheduler=scheduler).execute(REPO_OWNER,"",headers,-1,context) for fetcher in fetchers]
+
+def refresh_repo(repo,keys,instances,headers,store,config):
+    # Només es tornen a demanar les dades afectades d'un repositori; la resta surt de la base de dades
+    instances = [instance for instance in instances if instance.provides in keys]
+    store.replace_repo(repo,fetch_repos([repo],instances,headers,{})[repo],keys)
+    global_keys = {fetcher.provides for fetcher in api.global_fetchers(keys)}
+    if global_keys:
+        members = [member for value in store.values('members') for member in value]
+        store.replace_repo(GLOBAL,fetch_globals(config,global_keys,headers,members,[repo]),global_keys)
 
-            for future in concurrent.futures.as_completed(futures):
-                combinar_resultats(future.result(),data)
+def run_collectors(data,metrics,config,keys=None):
     members = data['members']  
     members = [m for m in members if m not in config['excluded_members']]
-    instances = []
-    for class_name, class_obj in metricsCollectors.__dict__.items():
-        if isinstance(class_obj, type) and class_name.startswith('Collect') and not bool(getattr(class_obj, "__abstractmethods__", False)):
-            instances.append(class_obj())
-    for instance in instances:
-       metrics = instance.execute(data,metrics,members)
-    with open(metrics_path, "w") as f:
-        json.dump(metrics, f, indent=4)
+    instances = metricsCollectors.collectors(enabled_features(config),strategy=FETCH_STRATEGY)
+    add_missing_metrics(metrics,config,members)
+    if keys is not None:
+        instances = [instance for instance in instances if set(instance.reads) & keys]
+    # Els col·lectors independents s'executen alhora; els que escriuen les mateixes claus, per ordre.
+    # cProfile només veu el fil principal: si s'hi perfila, s'executen seqüencialment
+    return ParallelCollectors(PARALLELISM and METRICS_PROFILE != "cprofile").execute(instances,data,metrics,members)
+
+def add_missing_metrics(metrics,config,members):
+    # Els col·lectors de les funcionalitats desactivades no s'executen i metrics.json en conserva
+    # els valors anteriors. El dashboard llegeix aquestes claus igualment: si encara no hi són,
+    # es creen a partir de dades buides
+    for collector in metricsCollectors.collectors(enabled_features(config),enabled=False,strategy=FETCH_STRATEGY,written=metrics):
+        missing = [key for key in collector.writes if key not in metrics]
+        if missing:
+            empty = {key: TABLES[key]() if key in TABLES else {} for key in collector.reads}
+            result = collector.execute(empty,{},members)
+            metrics.update({key: result[key] for key in missing})
+
+def collector_profiler():
+    if not METRICS_PROFILE:
+        return contextlib.nullcontext()
+    return Profiler(METRICS_PROFILE, PROFILE_PATHS.get(METRICS_PROFILE, "../metrics_profile"))
+
+def write_run_report(profiler=None):
+    # Informe de l'execució al costat de metrics.json: durada de cada fase, repositori, fetcher i
+    # col·lector, amb les peticions, pàgines, bytes i cost de GraphQL de cadascun
+    spans = tracer.report()
+    report = {
+        "started_at": spans["started_at"],
+        "parallelism": PARALLELISM_MODE,
+        "requests": scheduler.report(),
+        "summary": spans["summary"],
+        "spans": spans["spans"]
+    }
+    if isinstance(profiler, Profiler):
+        report["profile"] = profiler.report()
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=4)
+
+def report_output(content_hash,changed):
+    # El workflow no fa commit ni push si metrics.json no ha canviat
+    print(f"metrics.json sha256={content_hash} {'canviat' if changed else 'sense canvis'}")
+    output_path = os.getenv("GITHUB_OUTPUT")
+    if output_path:
+        with open(output_path, "a") as f:
+            f.write(f"hash={content_hash}\nchanged={'true' if changed else 'false'}\n")
+
+def load_config():
+    config_path = "../config.json"
+    if os.path.exists(config_path):
+        with open(config_path,'r') as f:
+            config = json.load(f)
+    else:
+        raise FileNotFoundError("Arxiu config.json no trobat.")
+    validar_config(config)
+    if FETCH_STRATEGY not in valid_strategies:
+        raise ConfigError(f"Error: FETCH_STRATEGY no té un valor vàlid. Valors vàlids: {valid_strategies}")
+    if COMMITS_SOURCE not in valid_commit_sources:
+        raise ConfigError(f"Error: COMMITS_SOURCE no té un valor vàlid. Valors vàlids: {valid_commit_sources}")
+    return config
+
+def get_metrics(scope=None,offline=False):
+    tracer.reset()
+    profiler = collector_profiler()
+    try:
+        with tracer.span("get_metrics", parallelism=PARALLELISM_MODE, event=scope is not None, offline=offline):
+            update_metrics(scope,offline,profiler)
+    finally:
+        # També si l'execució falla: l'informe diu fins on ha arribat i on s'ha aturat
+        write_run_report(profiler)
+
+def update_metrics(scope,offline,profiler):
+    config = load_config()
+    metrics_path = "../metrics.json"
+    if os.path.exists(metrics_path):
+        try:
+            with open(metrics_path, "r") as j:
+                metrics = json.load(j)
+        except (json.JSONDecodeError, ValueError):
+            metrics = {}
+    else:
+        metrics = {}
+    store = default_store()
+    if offline:
+        # Es recalcula tot a partir de la base de dades, sense cap trucada a l'API
+        check_stored(config,store)
+        keys = None
+    # Amb metrics_scope "org", els esdeveniments són tots del repositori del dashboard però
+    # l'activitat dels altres repositoris no en genera cap: cal tornar-ho a demanar tot
+    elif scope is not None and config['metrics_scope'] == "repo" and scope[0] in config['excluded_repos']:
+        print(f"El repositori {scope[0]} està exclòs: no cal recalcular res")
+        return
+    elif scope is not None and config['metrics_scope'] == "repo" and not scope[1] & required_data(config):
+        print("L'esdeveniment només afecta funcionalitats desactivades: no cal recalcular res")
+        return
+    elif scope is not None and config['metrics_scope'] == "repo" and metrics and store.has_repo(scope[0]) and required_data(config) <= store.keys():
+        repo, keys = scope
+        keys = keys & required_data(config)
+        instances, HEADERS = build_instances(config)
+        with tracer.span("fetch"):
+            refresh_repo(repo,keys,instances,HEADERS,store,config)
+    else:
+        keys = None
+        instances, HEADERS = build_instances(config)
+        with tracer.span("fetch"):
+            fetch_all(config,instances,HEADERS,store)
+    with tracer.span("load"):
+        data = combinar_resultats(store.partials())
+    with tracer.span("collectors"), profiler:
+        metrics = run_collectors(data,metrics,config,keys)
+    with tracer.span("write"):
+        content_hash, changed = MetricsWriter(METRICS_FORMAT,METRICS_COMPRESS).write(metrics_path,metrics)
+    report_output(content_hash,changed)
+    print(f"Cost de l'execució a l'API: {json.dumps(scheduler.report())}")
 
 def daily_metrics():
     metrics_path = "../metrics.json"
@@ -162,27 +399,90 @@ def daily_metrics():
         get_metrics()
         with open(metrics_path, "r") as j:
             metrics = json.load(j)
-    if os.path.exists(historic_metrics_path):
+    history = HistoryStore()
+    if not history.exists() and os.path.exists(historic_metrics_path):
         try:
             with open(historic_metrics_path, "r") as j:
-                historic = json.load(j)
+                history.import_history(json.load(j))
         except (json.JSONDecodeError, ValueError):
-            historic = {}
-    else:
-        historic = {}
+            pass
     date = datetime.now(timezone.utc).date() - timedelta(days=1)
     metrics.pop("avatars",None)
-    historic[date.strftime("%Y-%m-%d")] = metrics
-    with open(historic_metrics_path, "w") as j:
-        json.dump(historic,j,indent=4)
+    # Només s'afegeix el dia d'ahir: no cal llegir ni reescriure tot l'històric
+    existed = history.append(date.strftime("%Y-%m-%d"), metrics)
+    # Sèries setmanals i mensuals per al dashboard; la primera vegada es calculen amb tot l'històric
+    rollups = Rollups(history.path)
+    if rollups.exists():
+        rollups.update(date.strftime("%Y-%m-%d"), metrics)
+    else:
+        rollups.rebuild(history)
+    if HISTORIC_LEGACY:
+        history.write_legacy(historic_metrics_path, date.strftime("%Y-%m-%d"), metrics, existed)
+
+def backfill_metrics(start,end,overwrite=False,offline=False):
+    # Omple els dies que falten a l'històric amb una sola passada per les dates dels commits,
+    # issues i PRs, en lloc de recalcular totes les mètriques un cop per dia. Calen les dates de
+    # cada issue i PR: sempre es fa servir l'estratègia "nodes"
+    config = load_config()
+    store = default_store()
+    if offline:
+        check_stored(config,store,"nodes")
+    else:
+        instances, HEADERS = build_instances(config,"nodes")
+        fetch_all(config,instances,HEADERS,store,"nodes")
+    data = combinar_resultats(store.partials())
+    members = [m for m in data['members'] if m not in config['excluded_members']]
+    history = HistoryStore()
+    written = 0
+    for day, metrics in Backfill(data,members).days(start,end):
+        if overwrite or history.snapshot(day) is None:
+            history.append(day,metrics)
+            written += 1
+    Rollups(history.path).rebuild(history)
+    if HISTORIC_LEGACY:
+        history.rewrite_legacy("../historic_metrics.json")
+    print(f"Dies afegits a l'històric: {written}")
+
+def historic_snapshot(day):
+    # Mètriques guardades d'un dia ("AAAA-MM-DD"), reconstruïdes a partir del keyframe del mes
+    return HistoryStore().snapshot(day)
+
+def historic_series(path,start=None,end=None):
+    # Sèrie diària d'una mètrica, p. ex. historic_series("commits.alice","2025-01-01","2025-03-31")
+    return HistoryStore().series(path,start,end)
+
+def parse_backfill_args(args):
+    yesterday = (datetime.now(timezone.utc).date() - timedelta(days=1)).strftime("%Y-%m-%d")
+    parser = argparse.ArgumentParser(prog="metrics.py backfill")
+    parser.add_argument("--from", dest="start", required=True, help="Primer dia (AAAA-MM-DD)")
+    parser.add_argument("--to", dest="end", default=yesterday, help="Últim dia (AAAA-MM-DD), per defecte ahir")
+    parser.add_argument("--overwrite", action="store_true", help="Substitueix també els dies que ja hi són")
+    parser.add_argument("--offline", action="store_true", help="Fa servir les dades desades, sense cap trucada a l'API")
+    return parser.parse_args(args)
 
 def main():
     daily_mode = False
+    event_mode = False
+    recompute_mode = False
+    backfill_mode = False
     if len(sys.argv) > 1:
         if sys.argv[1] == "daily":
             daily_mode = True
+        elif sys.argv[1] == "event":
+            event_mode = True
+        elif sys.argv[1] == "recompute":
+            recompute_mode = True
+        elif sys.argv[1] == "backfill":
+            backfill_mode = True
     if daily_mode:
         daily_metrics()
+    elif event_mode:
+        get_metrics(event_scope())
+    elif recompute_mode:
+        get_metrics(offline=True)
+    elif backfill_mode:
+        args = parse_backfill_args(sys.argv[2:])
+        backfill_metrics(args.start,args.end,args.overwrite,args.offline)
     else: 
         get_metrics()
 
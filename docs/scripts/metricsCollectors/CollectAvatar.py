@@ -1,6 +1,9 @@
 from .CollectorBase import CollectorBase
 
 class CollectAvatar(CollectorBase):
+    reads = ("members_images",)
+    writes = ("avatars",)
+
     def execute(self, data: dict, metrics: dict, members) -> dict:
         metrics["avatars"] =  data['members_images']
         return metrics
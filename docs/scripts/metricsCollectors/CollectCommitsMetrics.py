@@ -1,76 +1,43 @@
 from .CollectorBase import CollectorBase
-from datetime import datetime, timedelta,timezone
+from .Columns import Columns
+from .StreakIndex import StreakIndex
+from datetime import datetime,timezone
 
 class CollectCommitsMetrics(CollectorBase):
-    def execute(self, data: dict, metrics: dict, members) -> dict:
-        commits = data['commits']
-        commits_per_member = {member: 0 for member in members}
-        modified_lines_per_member = {
-                member: {
-                    "additions": 0,
-                    "deletions": 0,
-                    "modified": 0
-                }
-            for member in members
-            }
-        streaks_per_member = {member: 0 for member in members}
-        commit_dates = {member: [] for member in members}
-        anonymous_commits = 0    
-        total_commits = 0
-        total_additions = 0
-        total_deletions = 0
-        total_modified = 0
-        commit_merges = 0
-        for _,commit in commits.items():
-            if commit['merge']:
-                commit_merges +=1
-            elif commit['author'] in commits_per_member:
-                commit_dates[commit['author']].append(datetime.strptime(commit['date']  , "%Y-%m-%d").date())
-                commits_per_member[commit['author']] +=1
-                modified_lines_per_member[commit['author']]['additions'] += commit['additions']
-                total_additions += commit['additions'] 
-                modified_lines_per_member[commit['author']]['deletions'] += commit['deletions']
-                total_deletions += commit['deletions'] 
-                modified_lines_per_member[commit['author']]['modified'] += commit['modified']
-                total_modified += commit['modified']
-                total_commits +=1
-            elif commit['author'] != "github-actions[bot]":
-                anonymous_commits += 1
-                total_commits +=1
-        today = datetime.now(timezone.utc).date()
-        yesterday = today - timedelta(days=1)
-        for member, dates in commit_dates.items():
-            unique_dates = set(dates)  
+    reads = ("commits",)
+    writes = ("commits", "modified_lines", "commit_streak", "commit_merges", "longest_commit_streak_per_user")
+    cpu_bound = True
 
-            if today in unique_dates:
-                streak = 1
-                day = yesterday
-                while day in unique_dates:
-                    streak += 1
-                    day -= timedelta(days=1)
-            elif yesterday in unique_dates:
-                streak = 1
-                day = yesterday - timedelta(days=1)
-                while day in unique_dates:
-                    streak += 1
-                    day -= timedelta(days=1)
-            else:
-                streak = 0
-            streaks_per_member[member] = streak
+    def execute(self, data: dict, metrics: dict, members) -> dict:
+        commits = Columns(data['commits'], categorical=("author",), numeric=("additions", "deletions", "modified"), flags=("merge",), dates=("date",))
+        merges = commits.flag("merge", True)
+        not_merge = commits.negate(merges)
+        by_member = commits.both(not_merge, commits.isin("author", members))
+        anonymous = commits.both(commits.both(not_merge, commits.negate(by_member)), commits.negate(commits.equals("author", "github-actions[bot]")))
+        commit_merges = commits.count(merges)
+        anonymous_commits = commits.count(anonymous)
+        member_commits = commits.count_by("author", by_member)
+        commits_per_member = {member: member_commits.get(member, 0) for member in members}
+        modified_lines_per_member = {member: {} for member in members}
+        totals = {}
+        for column in ("additions", "deletions", "modified"):
+            sums = commits.sum_by("author", column, by_member)
+            for member in members:
+                modified_lines_per_member[member][column] = sums.get(member, 0)
+            totals[column] = commits.sum(column, by_member)
+        total_commits = commits.count(by_member) + anonymous_commits
+        streaks = StreakIndex.from_days(commits.unique_by("author", "date", by_member))
+        today = datetime.now(timezone.utc).date().toordinal()
+        streaks_per_member = {member: streaks.current(member, today) for member in members}
         commits_per_member["anonymous"] = anonymous_commits
         commits_per_member["total"] = total_commits
-        modified_lines_per_member["total"] = {
-                    "additions": total_additions,
-                    "deletions": total_deletions,
-                    "modified": total_modified
-                }
+        modified_lines_per_member["total"] = totals
         metrics["commits"] = commits_per_member
         metrics["modified_lines"] = modified_lines_per_member
         metrics["commit_streak"] = streaks_per_member  
         metrics["commit_merges"] = commit_merges  
-        for member, streak in streaks_per_member.items():
-            if member not in metrics.get('longest_commit_streak_per_user', {}):
-                metrics.setdefault('longest_commit_streak_per_user', {})[member] = streak
-            else:
-                metrics['longest_commit_streak_per_user'][member] = max(metrics['longest_commit_streak_per_user'][member], streak)
-        return metrics
\ No newline at end of file
+        # La ratxa més llarga es calcula sobre tot l'historial, no només a partir de la ratxa actual
+        longest = metrics.setdefault('longest_commit_streak_per_user', {})
+        for member in members:
+            longest[member] = max(longest.get(member, 0), streaks.longest_streak(member))
+        return metrics
@@ -0,0 +1,33 @@
+from .CollectorBase import CollectorBase
+
+class CollectIssueCounts(CollectorBase):
+    # Les mateixes mètriques que CollectIssues a partir dels recomptes de l'estratègia "counts".
+    # La cerca compta tots els assignats d'una issue i CollectIssues només el primer: amb issues de
+    # més d'un assignat, `assigned` i `closed` de cada membre poden ser més alts, i `non_assigned`
+    # només compta les issues sense cap membre entre els assignats
+    reads = ("issue_counts", "member_counts")
+    writes = ("issues",)
+    feature = "issues"
+    strategy = "counts"
+
+    def execute(self, data: dict, metrics: dict, members) -> dict:
+        repos = data['issue_counts'].values()
+        member_counts = data['member_counts']
+        assigned = member_counts.get('assigned', {})
+        closed = member_counts.get('closed', {})
+        linked = {}
+        for counts in repos:
+            for assignee, (with_pr, author_is_assignee) in counts['linked'].items():
+                totals = linked.setdefault(assignee, [0, 0])
+                totals[0] += with_pr
+                totals[1] += author_is_assignee
+        total = sum(counts['total'] for counts in repos)
+        assigned_members = [member for member in members if member is not None]
+        metrics['issues'] = {'assigned': {member: assigned.get(member, 0) for member in members}}
+        metrics['issues']['assigned']['non_assigned'] = member_counts.get('non_assigned', 0)
+        metrics['issues']['closed'] = {member: closed.get(member, 0) for member in members}
+        metrics['issues']['have_pull_request'] = sum(linked.get(member, [0, 0])[0] for member in assigned_members)
+        metrics['issues']['assignee_is_pr_author'] = sum(linked.get(member, [0, 0])[1] for member in assigned_members)
+        metrics['issues']['total_closed'] = sum(counts['closed'] for counts in repos)
+        metrics['issues']['total'] = total
+        return metrics
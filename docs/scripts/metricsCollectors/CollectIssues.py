@@ -1,36 +1,28 @@
 from .CollectorBase import CollectorBase
+from .Columns import Columns
 
 class CollectIssues(CollectorBase):
+    reads = ("issues",)
+    writes = ("issues",)
+    feature = "issues"
+    strategy = "nodes"
+
     def execute(self, data: dict, metrics: dict, members) -> dict:
-        issues = data['issues']
-        assigned_issues_per_member = {member: 0 for member in members}
-        closed_assigned_issues_per_member = {member: 0 for member in members}
-        non_assigned = 0
-        have_pr = 0
-        assignee_is_pr_author = 0
-        total = 0
-        total_closed = 0
-        for _,issue in issues.items():
-            if issue['state'] == 'CLOSED':
-                total_closed += 1
-            if issue['assignee'] != None and issue['assignee'] in members:
-                assigned_issues_per_member[issue['assignee']] +=1
-                if issue['state'] == 'CLOSED':
-                    closed_assigned_issues_per_member[issue['assignee']] += 1
-                    if issue["has_pull_request"] == True : 
-                        have_pr += 1
-                        if issue["pr_author_is_assignee"] == True:
-                            assignee_is_pr_author += 1
-            else:
-                non_assigned += 1
-            total += 1
+        issues = Columns(data['issues'], categorical=("state", "assignee"), flags=("has_pull_request", "pr_author_is_assignee"))
+        closed = issues.equals("state", "CLOSED")
+        assigned = issues.isin("assignee", [member for member in members if member is not None])
+        assigned_closed = issues.both(assigned, closed)
+        with_pr = issues.both(assigned_closed, issues.flag("has_pull_request", True))
+        assigned_counts = issues.count_by("assignee", assigned)
+        closed_counts = issues.count_by("assignee", assigned_closed)
+        assigned_issues_per_member = {member: assigned_counts.get(member, 0) for member in members}
+        closed_assigned_issues_per_member = {member: closed_counts.get(member, 0) for member in members}
         metrics['issues']= {'assigned': assigned_issues_per_member
         }
-        metrics['issues']['assigned']['non_assigned'] = non_assigned
+        metrics['issues']['assigned']['non_assigned'] = issues.length - issues.count(assigned)
         metrics['issues']['closed'] = closed_assigned_issues_per_member
-        metrics['issues']['have_pull_request'] = have_pr
-        metrics['issues']['assignee_is_pr_author'] = assignee_is_pr_author
-        metrics['issues']['total_closed'] = total_closed
-        metrics['issues']['total'] = total
+        metrics['issues']['have_pull_request'] = issues.count(with_pr)
+        metrics['issues']['assignee_is_pr_author'] = issues.count(issues.both(with_pr, issues.flag("pr_author_is_assignee", True)))
+        metrics['issues']['total_closed'] = issues.count(closed)
+        metrics['issues']['total'] = issues.length
         return metrics
-         
\ No newline at end of file
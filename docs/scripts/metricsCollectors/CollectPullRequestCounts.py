@@ -0,0 +1,25 @@
+from .CollectorBase import CollectorBase
+
+class CollectPullRequestCounts(CollectorBase):
+    # Les mateixes mètriques que CollectPullRequests a partir dels recomptes de l'estratègia "counts"
+    reads = ("pull_request_counts", "member_counts")
+    writes = ("pull_requests",)
+    feature = "pull-requests"
+    strategy = "counts"
+
+    def execute(self, data: dict, metrics: dict, members) -> dict:
+        repos = data['pull_request_counts'].values()
+        created = data['member_counts'].get('created', {})
+        merged_by = {}
+        for counts in repos:
+            for login, count in counts['merged_by'].items():
+                merged_by[login] = merged_by.get(login, 0) + count
+        metrics['pull_requests'] = {
+            'created': {member: created.get(member, 0) for member in members},
+            'merged_per_member': {member: merged_by.get(member, 0) for member in members},
+            'merged': sum(counts['merged'] for counts in repos),
+            'not_merged_by_author': sum(counts['not_merged_by_author'] for counts in repos),
+            'closed': sum(counts['closed'] for counts in repos),
+            'total': sum(counts['total'] for counts in repos)
+        }
+        return metrics
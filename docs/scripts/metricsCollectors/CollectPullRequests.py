@@ -1,30 +1,29 @@
 from .CollectorBase import CollectorBase
+from .Columns import Columns
 
 class CollectPullRequests(CollectorBase):
+    reads = ("pull_requests",)
+    writes = ("pull_requests",)
+    feature = "pull-requests"
+    strategy = "nodes"
+
     def execute(self, data: dict, metrics: dict, members) -> dict:
-        pull_requests = data['pull_requests']
-        total = 0
-        merged = 0
-        closed = 0
-        not_merged_by_author = 0
+        pull_requests = Columns(data['pull_requests'], categorical=("state", "author", "merged_by"), flags=("merged",))
         created_PRs_per_member = {member: 0 for member in members}
         merged_PRs_per_member = {member: 0 for member in members}
-        for _,pull_request in pull_requests.items():
-            total += 1
-            created_PRs_per_member[pull_request["author"]] += 1
-            if pull_request['merged'] != False: 
-                merged += 1
-                merged_PRs_per_member[pull_request["merged_by"]] += 1
-                if pull_request["author"] != pull_request["merged_by"]:
-                    not_merged_by_author +=1
-            elif pull_request['state'] == 'CLOSED': # Quan merged, state es 'closed'
-                closed += 1
+        merged = pull_requests.negate(pull_requests.flag("merged", False))
+        # Quan merged, state es 'closed'
+        closed = pull_requests.both(pull_requests.negate(merged), pull_requests.equals("state", "CLOSED"))
+        for author, count in pull_requests.count_by("author").items():
+            created_PRs_per_member[author] += count
+        for merged_by, count in pull_requests.count_by("merged_by", merged).items():
+            merged_PRs_per_member[merged_by] += count
         metrics['pull_requests'] = {
             'created' : created_PRs_per_member,
             'merged_per_member' : merged_PRs_per_member,
-            'merged': merged,
-            'not_merged_by_author': not_merged_by_author,
-            'closed': closed,
-            'total': total
+            'merged': pull_requests.count(merged),
+            'not_merged_by_author': pull_requests.count(pull_requests.both(merged, pull_requests.differs("author", "merged_by"))),
+            'closed': pull_requests.count(closed),
+            'total': pull_requests.length
         }
-        return metrics
\ No newline at end of file
+        return metrics
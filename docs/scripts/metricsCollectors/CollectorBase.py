@@ -1,6 +1,16 @@
 from abc import ABC, abstractmethod
 
 class CollectorBase(ABC):
+    # Claus de `data` que llegeix el col·lector i claus de `metrics` que escriu
+    reads = ()
+    writes = ()
+    # Els col·lectors amb molt de càlcul es poden executar en un altre procés
+    cpu_bound = False
+    # Funcionalitat de config.json que l'activa (None: sempre actiu) i estratègia de descàrrega
+    # per a la qual serveix (None: totes)
+    feature = None
+    strategy = None
+
     @abstractmethod
     def execute(self, data: dict, metrics: dict, members) -> dict:
         pass
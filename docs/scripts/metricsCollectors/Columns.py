@@ -0,0 +1,102 @@
+import operator
+from array import array
+from collections import Counter
+from datetime import date
+from itertools import compress, repeat
+from api.RecordTable import RecordTable, strings
+
+class Columns:
+    # Taula columnar a partir d'un dict de registres: cada camp és un array compacte.
+    # Els textos (autors, estats...) comparteixen un sol diccionari de codis enters, de
+    # manera que comparar dues columnes de persones és comparar enters
+    def __init__(self, records: dict, categorical=(), numeric=(), flags=(), dates=()):
+        if isinstance(records, RecordTable):
+            # Les taules dels fetchers ja són columnars: es fan servir els seus arrays directament
+            self.length = len(records)
+            self.codes = {name: records.column(name) for name in (*categorical, *numeric, *flags, *dates)}
+            self.labels = strings.labels
+            self.encoder = strings.ids
+            return
+        values = list(records.values())
+        self.length = len(values)
+        self.codes = {}
+        encoder = {}
+        for name in categorical:
+            self.codes[name] = array("l", [encoder.setdefault(record[name], len(encoder)) for record in values])
+        self.labels = list(encoder)
+        self.encoder = encoder
+        for name in numeric:
+            self.codes[name] = array("q", [record[name] for record in values])
+        for name in flags:
+            # Es desa el valor tal qual (True/False/None) com a 1/0/2 per poder-lo comparar després
+            self.codes[name] = array("b", [2 if record[name] is None else int(record[name]) for record in values])
+        for name in dates:
+            # Cada data diferent es converteix a ordinal un sol cop, no un cop per registre
+            day_codes = {}
+            codes = [day_codes.setdefault(record[name], len(day_codes)) for record in values]
+            ordinals = [date.fromisoformat(day).toordinal() for day in day_codes]
+            self.codes[name] = array("l", map(ordinals.__getitem__, codes))
+
+    # Màscares: bytes amb un 0/1 per registre; les operacions lògiques es fan sobre enters grans
+    def all(self):
+        return b"\x01" * self.length
+
+    def equals(self, name, value):
+        code = self.encoder.get(value, -1)
+        return bytes(map(operator.eq, self.codes[name], repeat(code)))
+
+    def flag(self, name, value):
+        value = 2 if value is None else int(value)
+        return bytes(map(operator.eq, self.codes[name], repeat(value)))
+
+    def differs(self, name, other):
+        return bytes(map(operator.ne, self.codes[name], self.codes[other]))
+
+    def isin(self, name, values):
+        values = set(values)
+        accepted = [label in values for label in self.labels]
+        return bytes(map(accepted.__getitem__, self.codes[name]))
+
+    def both(self, mask, other):
+        return self.from_int(int.from_bytes(mask, "little") & int.from_bytes(other, "little"))
+
+    def negate(self, mask):
+        return self.from_int(int.from_bytes(mask, "little") ^ int.from_bytes(self.all(), "little"))
+
+    def from_int(self, value):
+        return value.to_bytes(self.length, "little")
+
+    def count(self, mask):
+        return mask.count(1)
+
+    def sum(self, name, mask=None):
+        column = self.codes[name]
+        return sum(column if mask is None else compress(column, mask))
+
+    # Agregacions per grup: {etiqueta: valor}
+    def count_by(self, name, mask=None):
+        column = self.codes[name]
+        counts = Counter(column if mask is None else compress(column, mask))
+        return {self.labels[code]: count for code, count in counts.items()}
+
+    def sum_by(self, name, value, mask=None):
+        keys = self.codes[name]
+        values = self.codes[value]
+        if mask is not None:
+            keys = compress(keys, mask)
+            values = compress(values, mask)
+        sums = [0] * len(self.labels)
+        for code, amount in zip(keys, values):
+            sums[code] += amount
+        return dict(zip(self.labels, sums))
+
+    def unique_by(self, name, value, mask=None):
+        keys = self.codes[name]
+        values = self.codes[value]
+        if mask is not None:
+            keys = compress(keys, mask)
+            values = compress(values, mask)
+        groups = {}
+        for code, item in zip(keys, values):
+            groups.setdefault(code, set()).add(item)
+        return {self.labels[code]: items for code, items in groups.items()}
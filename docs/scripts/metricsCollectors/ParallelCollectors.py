@@ -0,0 +1,86 @@
+import concurrent.futures
+import multiprocessing
+from tracing import tracer
+
+COLLECTOR_WORKERS = 4
+# Per sota d'aquesta mida, enviar les dades a un altre procés costa més que calcular-les aquí
+PROCESS_MIN_RECORDS = 50000
+
+def run_collector(collector, data, metrics, members):
+    return collector.execute(data, metrics, members)
+
+def traced_collector(collector, process_pool, data, metrics, members):
+    # Als col·lectors que van a un altre procés se'ls mesura des d'aquí, esperant-ne el resultat
+    with tracer.span("collector", collector=collector.__class__.__name__, process=process_pool is not None):
+        if process_pool is None:
+            return run_collector(collector, data, metrics, members)
+        return process_pool.submit(run_collector, collector, data, metrics, members).result()
+
+class ParallelCollectors:
+    # Executa alhora els col·lectors que no escriuen les mateixes claus de `metrics`.
+    # Cada col·lector rep només les dades que llegeix i les mètriques que escriu, i
+    # els resultats es fusionen en l'ordre dels col·lectors
+    def __init__(self, parallel=True, workers=COLLECTOR_WORKERS, process_min_records=PROCESS_MIN_RECORDS):
+        self.parallel = parallel
+        self.workers = workers
+        self.process_min_records = process_min_records
+
+    def waves(self, collectors):
+        # Un col·lector va a la ronda següent de l'últim amb qui comparteix alguna clau escrita
+        waves = []
+        written = []
+        for collector in collectors:
+            wave = 0
+            for i, keys in enumerate(written):
+                if keys & set(collector.writes):
+                    wave = max(wave, i + 1)
+            if wave == len(waves):
+                waves.append([])
+                written.append(set())
+            waves[wave].append(collector)
+            written[wave] |= set(collector.writes)
+        return waves
+
+    def use_process(self, collector, data):
+        return (self.parallel and collector.cpu_bound
+                and sum(len(data.get(key) or ()) for key in collector.reads) >= self.process_min_records)
+
+    def merge(self, collector, result, metrics):
+        undeclared = set(result) - set(collector.writes)
+        if undeclared:
+            raise RuntimeError(f"El col·lector {collector.__class__.__name__} escriu claus no declarades: {sorted(undeclared)}")
+        for key, value in result.items():
+            metrics[key] = value
+
+    def execute(self, collectors, data, metrics, members) -> dict:
+        for wave in self.waves(collectors):
+            inputs = [
+                ({key: data[key] for key in collector.reads if key in data},
+                 {key: metrics[key] for key in collector.writes if key in metrics})
+                for collector in wave
+            ]
+            if not self.parallel or len(wave) == 1 and not self.use_process(wave[0], data):
+                results = [traced_collector(collector, None, *collector_input, members) for collector, collector_input in zip(wave, inputs)]
+            else:
+                results = self.run_wave(wave, inputs, data, members)
+            for collector, result in zip(wave, results):
+                self.merge(collector, result, metrics)
+        return metrics
+
+    def run_wave(self, wave, inputs, data, members):
+        heavy = [self.use_process(collector, data) for collector in wave]
+        process_pool = None
+        if any(heavy):
+            process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(self.workers, heavy.count(True)),
+                mp_context=multiprocessing.get_context("spawn"))
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as thread_pool:
+                futures = [
+                    thread_pool.submit(tracer.bind(traced_collector), collector, process_pool if is_heavy else None, *collector_input, members)
+                    for collector, collector_input, is_heavy in zip(wave, inputs, heavy)
+                ]
+                return [future.result() for future in futures]
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown()
@@ -0,0 +1,63 @@
+from array import array
+from bisect import bisect_left
+
+class StreakIndex:
+    # Per a cada membre, els dies amb commits (ordinals, ordenats i sense repetir) i, per a
+    # cada dia, la llargada de la ratxa que hi acaba. Així qualsevol consulta és una cerca binària
+    def __init__(self):
+        self.days = {}
+        self.runs = {}
+        self.longest = {}
+
+    @classmethod
+    def from_days(cls, days_per_member: dict):
+        index = cls()
+        for member, days in days_per_member.items():
+            index.build(member, days)
+        return index
+
+    def build(self, member, days):
+        days = array("i", sorted(set(days)))
+        runs = array("i", [0]) * len(days)
+        longest = 0
+        for i, day in enumerate(days):
+            runs[i] = runs[i - 1] + 1 if i > 0 and days[i - 1] == day - 1 else 1
+            longest = max(longest, runs[i])
+        self.days[member] = days
+        self.runs[member] = runs
+        self.longest[member] = longest
+
+    def add(self, member, day):
+        # Afegeix un dia nou; només es recalculen les ratxes que hi queden enganxades
+        if member not in self.days:
+            self.build(member, [day])
+            return
+        days = self.days[member]
+        runs = self.runs[member]
+        i = bisect_left(days, day)
+        if i < len(days) and days[i] == day:
+            return
+        days.insert(i, day)
+        runs.insert(i, runs[i - 1] + 1 if i > 0 and days[i - 1] == day - 1 else 1)
+        j = i + 1
+        while j < len(days) and days[j] == days[j - 1] + 1:
+            runs[j] = runs[j - 1] + 1
+            j += 1
+        self.longest[member] = max(self.longest[member], runs[j - 1])
+
+    def streak_at(self, member, day):
+        # Ratxa de dies seguits amb commits que acaba exactament a `day`
+        days = self.days.get(member)
+        if not days:
+            return 0
+        i = bisect_left(days, day)
+        if i < len(days) and days[i] == day:
+            return self.runs[member][i]
+        return 0
+
+    def current(self, member, today):
+        # Si avui encara no hi ha commits, la ratxa d'ahir continua viva
+        return self.streak_at(member, today) or self.streak_at(member, today - 1)
+
+    def longest_streak(self, member):
+        return self.longest.get(member, 0)
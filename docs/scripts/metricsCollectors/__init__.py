@@ -1,11 +1,31 @@
 import pkgutil
 import importlib
+from api.Declarations import Declarations
 
-for _, module_name, _ in pkgutil.iter_modules(__path__):
-    module = importlib.import_module(f"{__name__}.{module_name}")
+# Cada mòdul Collect*.py del paquet és un col·lector: n'hi ha prou d'afegir-ne un de nou. Els
+# col·lectors es trien per les seves declaracions (`feature`, `strategy` i `writes`, vegeu
+# CollectorBase), que es llegeixen del codi font: només s'importen els mòduls dels que s'executen
+MODULES = [module_name for _, module_name, _ in pkgutil.iter_modules(__path__)
+           if module_name.lower().startswith("collect") and module_name != "CollectorBase"]
+declarations = Declarations(__path__[0], MODULES, "CollectorBase")
 
-    for attribute_name in dir(module):  
-        attribute = getattr(module, attribute_name)
+def load(name):
+    # El mòdul sol dir-se com la classe, però no sempre (CollectProject és a collectProject.py)
+    if name not in declarations.classes():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, _ = declarations.classes()[name]
+    collector = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = collector
+    return collector
 
-        if isinstance(attribute, type) and attribute_name.startswith("Collect"):
-            globals()[attribute_name] = attribute
+def collectors(features, enabled=True, strategy="nodes", written=None):
+    # Instàncies dels col·lectors de les funcionalitats actives (o, amb enabled=False, de les
+    # desactivades). Amb `written`, només els que escriuen alguna clau que encara no hi és
+    return [load(name)() for name, (_, collector) in declarations.classes().items()
+            if (collector.feature is None or collector.feature in features) == enabled and collector.strategy in (None, strategy)
+            and (written is None or any(key not in written for key in collector.writes))]
+
+def __getattr__(name):
+    if name.startswith("Collect"):
+        return load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,36 +1,25 @@
 from .CollectorBase import CollectorBase
+from .Columns import Columns
 
 class CollectProject(CollectorBase):
+    reads = ("project",)
+    writes = ("project",)
+    feature = "projects"
+
     def execute(self, data: dict, metrics: dict, members) -> dict:
-        draftIssues = data['project']
-        assigned_draftIssue_per_member = {member: 0 for member in members}
-        done_assigned_draftIssues_per_member = {member: 0 for member in members}
-        in_progress_assigned_draftIssues_per_member = {member: 0 for member in members}
-        non_assigned = 0
-        total = 0
-        total_done = 0
-        total_in_progress = 0
-        for _,draftIssue in draftIssues.items():
-            total +=1
-            if draftIssue['status'] == 'Done':
-                total_done += 1
-            elif draftIssue['status'] == 'In Progress':
-                total_in_progress += 1
-            if draftIssue['assignee'] != None and draftIssue['assignee'] in members:
-                assigned_draftIssue_per_member[draftIssue['assignee']] +=1
-                if draftIssue['status'] == 'Done':
-                    done_assigned_draftIssues_per_member[draftIssue['assignee']] += 1
-                elif draftIssue['status'] == 'In Progress':
-                    in_progress_assigned_draftIssues_per_member[draftIssue['assignee']] +=1
-            else:
-                non_assigned += 1
+        draftIssues = Columns(data['project'], categorical=("status", "assignee"))
+        done = draftIssues.equals("status", "Done")
+        in_progress = draftIssues.equals("status", "In Progress")
+        assigned = draftIssues.isin("assignee", [member for member in members if member is not None])
+        assigned_counts = draftIssues.count_by("assignee", assigned)
+        done_counts = draftIssues.count_by("assignee", draftIssues.both(assigned, done))
+        in_progress_counts = draftIssues.count_by("assignee", draftIssues.both(assigned, in_progress))
         metrics['project']= {
-            'assigned_per_member': assigned_draftIssue_per_member,
-            'in_progress_per_member': in_progress_assigned_draftIssues_per_member,
-            'done_per_member': done_assigned_draftIssues_per_member,
-            'in_progress': total_in_progress,
-            'done': total_done,
-            'total': total
+            'assigned_per_member': {member: assigned_counts.get(member, 0) for member in members},
+            'in_progress_per_member': {member: in_progress_counts.get(member, 0) for member in members},
+            'done_per_member': {member: done_counts.get(member, 0) for member in members},
+            'in_progress': draftIssues.count(in_progress),
+            'done': draftIssues.count(done),
+            'total': draftIssues.length
         }
         return metrics
-         
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import json
+import gzip
+import hashlib
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FORMATS = ("pretty", "compact")
+COMPRESSIONS = ("gzip", "brotli")
+# Els trossos petits de l'encoder s'agrupen abans d'escriure'ls, calcular-ne el hash i comprimir-los
+BUFFER_SIZE = 1 << 16
+EXTENSIONS = {"gzip": ".gz", "brotli": ".br"}
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class GzipSink:
+    def __init__(self, path):
+        # mtime=0: el mateix contingut dona sempre el mateix fitxer comprimit
+        self.file = gzip.GzipFile(path, "wb", compresslevel=9, mtime=0)
+
+    def write(self, chunk):
+        self.file.write(chunk)
+
+    def close(self):
+        self.file.close()
+
+class BrotliSink:
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.compressor = brotli.Compressor(quality=11)
+
+    def write(self, chunk):
+        self.file.write(self.compressor.process(chunk))
+
+    def close(self):
+        self.file.write(self.compressor.finish())
+        self.file.close()
+
+SINKS = {"gzip": GzipSink, "brotli": BrotliSink}
+
+class MetricsWriter:
+    # Escriu el JSON a mesura que es genera (sense construir-ne tot el text en memòria), i en la
+    # mateixa passada en calcula el sha256 i, si cal, les versions comprimides (.gz/.br)
+    def __init__(self, output_format="pretty", compress=()):
+        if output_format not in FORMATS:
+            raise ValueError(f"Format de sortida no vàlid: {output_format}. Valors vàlids: {list(FORMATS)}")
+        compress = [method for method in compress if method]
+        for method in compress:
+            if method not in COMPRESSIONS:
+                raise ValueError(f"Compressió no vàlida: {method}. Valors vàlids: {list(COMPRESSIONS)}")
+        if "brotli" in compress and brotli is None:
+            print("El paquet brotli no està instal·lat: només es genera la versió .gz")
+            compress = [method for method in compress if method != "brotli"] + ["gzip"]
+        self.output_format = output_format
+        self.compress = list(dict.fromkeys(compress))
+
+    def encoder(self):
+        if self.output_format == "compact":
+            return json.JSONEncoder(separators=(",", ":"))
+        # Mateix text que json.dump(..., indent=4)
+        return json.JSONEncoder(indent=4)
+
+    def write(self, path, data) -> tuple:
+        # Retorna (sha256, si el contingut ha canviat). Si no ha canviat no es toca cap fitxer
+        tmp_path = f"{path}.tmp"
+        sinks = {method: SINKS[method](f"{path}{EXTENSIONS[method]}.tmp") for method in self.compress}
+        digest = hashlib.sha256()
+        buffer = []
+        size = 0
+        with open(tmp_path, "wb") as f:
+            def flush():
+                chunk = "".join(buffer).encode()
+                f.write(chunk)
+                digest.update(chunk)
+                for sink in sinks.values():
+                    sink.write(chunk)
+                buffer.clear()
+
+            for piece in self.encoder().iterencode(data):
+                buffer.append(piece)
+                size += len(piece)
+                if size >= BUFFER_SIZE:
+                    flush()
+                    size = 0
+            flush()
+        for sink in sinks.values():
+            sink.close()
+        content_hash = digest.hexdigest()
+        targets = [path] + [f"{path}{EXTENSIONS[method]}" for method in self.compress]
+        changed = not (os.path.exists(path) and file_digest(path) == content_hash and all(os.path.exists(target) for target in targets))
+        for target in targets:
+            if changed:
+                os.replace(f"{target}.tmp", target)
+            else:
+                os.remove(f"{target}.tmp")
+        return content_hash, changed
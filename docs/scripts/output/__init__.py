@@ -0,0 +1 @@
+from .MetricsWriter import MetricsWriter
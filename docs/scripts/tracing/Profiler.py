@@ -0,0 +1,110 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+MODES = ("cprofile", "sampling")
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 20
+# Fils aturats esperant feina o un resultat: no són temps de càlcul i es descarten
+IDLE_FRAMES = {("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("thread.py", "_worker"),
+               ("queue.py", "get"), ("selectors.py", "select")}
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+class SamplingProfiler:
+    # Cada SAMPLE_INTERVAL segons es mira la pila de tots els fils (menys el seu): el cost no depèn
+    # del nombre de crides i veu els col·lectors que s'executen en fils. Els que van a un altre
+    # procés no hi surten
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def sample(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        # Format de piles plegades ("a;b;c mostres"), el que llegeixen flamegraph.pl i speedscope
+        with open(path, "w") as f:
+            for stack, samples in self.stacks.most_common():
+                f.write(f"{stack} {samples}\n")
+
+    def top(self, limit=TOP_FUNCTIONS):
+        own = Counter()
+        total = Counter()
+        for stack, samples in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += samples
+            for label in set(frames):
+                total[label] += samples
+        return [{"function": label, "own_samples": samples, "total_samples": total[label]}
+                for label, samples in own.most_common(limit)]
+
+class Profiler:
+    # Perfil opcional de l'etapa de col·lectors (METRICS_PROFILE=cprofile o sampling).
+    # cProfile només veu el fil on s'activa: en aquest mode els col·lectors s'han d'executar seqüencialment
+    def __init__(self, mode, path):
+        if mode not in MODES:
+            raise ValueError(f"Perfilador no vàlid: {mode}. Valors vàlids: {list(MODES)}")
+        self.mode = mode
+        self.path = path
+        self.profile = None
+        self.sampler = None
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self.sampler = SamplingProfiler()
+            self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.path)
+        else:
+            self.sampler.stop()
+            self.sampler.write(self.path)
+        self.seconds = time.perf_counter() - self.start
+
+    def top(self, limit=TOP_FUNCTIONS):
+        if self.sampler is not None:
+            return self.sampler.top(limit)
+        stats = pstats.Stats(self.profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [{
+            "function": f"{os.path.basename(filename)}:{name}:{line}",
+            "calls": calls,
+            "own_seconds": round(own_time, 4),
+            "total_seconds": round(total_time, 4)
+        } for (filename, line, name), (_, calls, own_time, total_time, _) in rows]
+
+    def report(self) -> dict:
+        return {"mode": self.mode, "path": self.path, "seconds": round(self.seconds, 3), "top": self.top()}
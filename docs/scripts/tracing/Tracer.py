@@ -0,0 +1,105 @@
+import contextlib
+import contextvars
+import threading
+import time
+from datetime import datetime, timezone
+
+COUNTERS = ("requests", "pages", "bytes", "graphql_cost", "not_modified")
+# Span actiu del fil o de la corrutina; els pools de fils el reben amb Tracer.bind
+current_span = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    def __init__(self, span_id, parent_id, name, attributes, start):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = start
+        self.duration = None
+        self.error = None
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+class Tracer:
+    # Intervals de temps niuats (get_metrics > repositori > fetcher > branca, col·lectors...) amb
+    # les peticions, pàgines, bytes rebuts i cost de GraphQL de cadascun
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.spans = []
+            self.origin = time.perf_counter()
+            self.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        parent = current_span.get()
+        with self.lock:
+            span = Span(len(self.spans), parent.id if parent else None, name, attributes, time.perf_counter() - self.origin)
+            self.spans.append(span)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = f"{error.__class__.__name__}: {error}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - self.origin - span.start
+            current_span.reset(token)
+
+    def count(self, **amounts):
+        # Suma els comptadors al span actiu; fora de cap span no es compta res
+        span = current_span.get()
+        if span is None:
+            return
+        with self.lock:
+            for name, amount in amounts.items():
+                span.counters[name] += amount
+
+    def bind(self, function):
+        # Per als pools de fils: la funció s'executa dins del span actiu en el moment de crear-la.
+        # Cada crida fa servir una còpia del context, perquè un context no es pot fer servir
+        # des de dos fils alhora
+        context = contextvars.copy_context()
+
+        def run(*args, **kwargs):
+            return context.copy().run(function, *args, **kwargs)
+        return run
+
+    def report(self) -> dict:
+        with self.lock:
+            spans = list(self.spans)
+        # Cada span acumula també els comptadors dels seus fills (els fills sempre són posteriors)
+        totals = [dict(span.counters) for span in spans]
+        for span in reversed(spans):
+            if span.parent_id is not None:
+                for name, amount in totals[span.id].items():
+                    totals[span.parent_id][name] += amount
+        summary = {}
+        for span in spans:
+            entry = summary.setdefault(span.name, {"count": 0, "seconds": 0.0, **dict.fromkeys(COUNTERS, 0)})
+            entry["count"] += 1
+            entry["seconds"] += span.duration or 0.0
+            for name, amount in span.counters.items():
+                entry[name] += amount
+        for entry in summary.values():
+            entry["seconds"] = round(entry["seconds"], 3)
+        return {
+            "started_at": self.started_at,
+            "spans": [{
+                "id": span.id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "attributes": span.attributes,
+                "start": round(span.start, 3),
+                "seconds": round(span.duration, 3) if span.duration is not None else None,
+                **({"error": span.error} if span.error else {}),
+                "own": span.counters,
+                "total": totals[span.id]
+            } for span in spans],
+            # Per nom: nombre de spans, segons acumulats (se sumen encara que s'encavalquin) i comptadors propis
+            "summary": summary
+        }
+
+tracer = Tracer()
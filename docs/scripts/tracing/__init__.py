@@ -0,0 +1,2 @@
+from .Tracer import Tracer, tracer
+from .Profiler import Profiler